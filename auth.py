@@ -0,0 +1,67 @@
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+
+from services import get_services
+from user_store import UserExists
+
+
+bp = Blueprint('auth', __name__)
+
+
+def is_logged_in():
+    return 'username' in session
+
+
+@bp.route('/', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
+def user_login():
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+        user_data = get_services().get_user_store().verify(username, password)
+        if user_data:
+            session['username'] = username
+            session['firstname'] = user_data.get('firstname') or ''
+            flash('Login successful!', 'success')
+            return redirect(url_for('auth.home'))
+        else:
+            flash('Invalid username or password', 'error')
+    return render_template('login.html')
+
+@bp.route('/signup', methods=['GET', 'POST'])
+def signup():
+    if request.method == 'POST':
+        username = request.form.get('username')
+        firstname = request.form.get('firstname')
+        lastname = request.form.get('lastname')
+        email = request.form.get('email')
+        password = request.form.get('password')
+        password2 = request.form.get('password2')
+
+        if not username or not password:
+            flash('Username and password are required', 'error')
+        elif password != password2:
+            flash('Passwords do not match', 'error')
+        else:
+            try:
+                get_services().get_user_store().create(username, password, firstname, lastname, email)
+            except UserExists:
+                flash('Username already exists', 'error')
+            else:
+                flash('Signup successful! Please log in.', 'success')
+                return redirect(url_for('auth.user_login'))
+    return render_template('signup.html')
+
+@bp.route('/logout')
+def logout():
+    session.pop('username', None)
+    session.pop('firstname', None)
+    flash('You have been logged out.', 'info')
+    return redirect(url_for('auth.user_login'))
+
+
+@bp.route('/home')
+def home():
+    if not is_logged_in():
+        flash('Please log in to access this page.', 'warning')
+        return redirect(url_for('auth.user_login'))
+    return render_template('home.html', firstname=session.get('firstname'))
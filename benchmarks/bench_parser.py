@@ -0,0 +1,113 @@
+"""Pages/sec of the result parser against the original inline implementation.
+
+    python benchmarks/bench_parser.py [PAGE_DIR] [--pages N] [--repeat R]
+
+With PAGE_DIR, every ``*.html`` in it is used (e.g. results/page); without
+it a synthetic corpus of N pages in both layouts is generated. Both
+implementations must agree on every page before timings are reported.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lxml import html  # noqa: E402
+
+import corpus  # noqa: E402
+import result_parser  # noqa: E402
+
+
+def legacy_parse(content):
+    """The parser as it was inlined in run_check_and_combine, minus prints."""
+    tree = html.fromstring(content)
+    result_table_element = tree.xpath('//table[contains(@class,"table")] | //table[@id="resultsTable"]')
+    subjects_list = []
+    marks_list = []
+    if result_table_element:
+        rows_in_table = result_table_element[0].xpath('.//tr')
+        for row_node in rows_in_table:
+            cells = row_node.xpath('.//td/descendant-or-self::*/text()')  # noqa: F841 (kept for parity)
+            td_elements = row_node.xpath('.//td')
+            if len(td_elements) > 4:
+                subject_code_texts = td_elements[1].xpath('.//text()')
+                subject_code = " ".join([s.strip() for s in subject_code_texts if s.strip()])
+                external_mark_texts = td_elements[4].xpath('.//text()')
+                external_mark = "".join([m.strip() for m in external_mark_texts if m.strip().isdigit() or m.strip() == 'AB' or m.strip() == 'NE'])
+                if subject_code and (external_mark.isdigit() or external_mark in ['AB', 'NE', 'ABSENT', 'FAIL', 'PASS']):
+                    if subject_code.lower() not in ["subject code", "subject name", "subject", "sl. no."]:
+                        subjects_list.append(subject_code)
+                        marks_list.append(external_mark)
+    if not subjects_list:
+        div_rows = tree.xpath('//div[contains(@class, "divTableRow")]')
+        for row_node in div_rows:
+            header_check_texts = "".join(row_node.xpath('.//div[contains(@class,"divTableCell")]//text()')).lower()
+            if "subject code" in header_check_texts or "internal marks" in header_check_texts:
+                continue
+            subject_code_texts = row_node.xpath('.//div[contains(@class,"divTableCell")][1]/descendant-or-self::*/text()')
+            subject_code = " ".join([s.strip() for s in subject_code_texts if s.strip()])
+            external_mark_texts = row_node.xpath('.//div[contains(@class,"divTableCell")][5]/descendant-or-self::*/text()')
+            external_mark = "".join([m.strip() for m in external_mark_texts if m.strip().isdigit() or m.strip() in ['AB', 'NE']])
+            if subject_code and (external_mark.isdigit() or external_mark in ['AB', 'NE']):
+                subjects_list.append(subject_code)
+                marks_list.append(external_mark)
+    return dict(zip(subjects_list, marks_list))
+
+
+def load_pages(page_dir):
+    pages = []
+    for name in sorted(os.listdir(page_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(page_dir, name), 'rb') as fp:
+                pages.append(fp.read().decode('utf-8', errors='replace'))
+    return pages
+
+
+def best_rate(parse, pages, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            parse(page)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(pages) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('page_dir', nargs='?')
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.page_dir:
+        pages = load_pages(args.page_dir)
+        source = args.page_dir
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus.write_corpus(tmp, args.pages)
+            pages = load_pages(tmp)
+        source = f'synthetic corpus ({args.pages} pages, div + table layouts)'
+    if not pages:
+        print('No pages to parse.')
+        return 1
+
+    mismatches = sum(1 for page in pages if legacy_parse(page) != result_parser.parse_result_page(page))
+    if mismatches:
+        print(f'{mismatches} page(s) parse differently between implementations; not timing.')
+        return 1
+
+    before = best_rate(legacy_parse, pages, args.repeat)
+    after = best_rate(result_parser.parse_result_page, pages, args.repeat)
+    print(f'Corpus: {source}')
+    print(f'  before (inline xpath strings): {before:8.1f} pages/sec')
+    print(f'  after  (compiled xpath):       {after:8.1f} pages/sec  ({after / before:.2f}x)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""End-to-end scrape -> parse -> export benchmark against the replay driver.
+
+    python benchmarks/bench_pipeline.py [--sizes 10 100 5000] [--latency 0.02]
+                                        [--sessions 4] [--compare latest|FILE]
+
+For each cohort size a job is submitted through /run_check_and_combine with
+benchmarks/replay.py standing in for the live site, and the following are
+measured:
+
+* end-to-end throughput (USNs/min, submit until the job is done)
+* parse pages/sec over the run's archived pages
+* xlsx and CSV export time (/download_excel), Parquet write time if pyarrow
+  or fastparquet is installed
+* /visualize_data latency, cold (first request after the data changed) and
+  warm (median of repeat requests)
+
+Results are written to benchmarks/results/pipeline-<timestamp>.json.
+``--compare`` checks them against an earlier file (``latest`` picks the most
+recent one) and exits with 1 if any metric regressed by more than
+``--threshold`` percent.
+
+waits.POLL_FREQUENCY is lowered to ``--poll`` so that the 0.25s production
+poll interval does not dominate what is being measured. With
+``--captcha-mode queue`` a background "operator" answers each captcha on
+the hand-off queue once it is ``--captcha-delay`` seconds old; ``--rate``
+sets the per-host request limit (0, the default here, disables it).
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(HERE, 'results')
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from ingest import parse_blobs  # noqa: E402
+import waits  # noqa: E402
+from replay import FakeDriver, PageSource  # noqa: E402
+
+
+# Metric name -> True if higher is better.
+METRICS = {
+    'usns_per_min': True,
+    'parse_pages_per_sec': True,
+    'xlsx_seconds': False,
+    'csv_seconds': False,
+    'parquet_seconds': False,
+    'visualize_cold_seconds': False,
+    'visualize_warm_seconds': False,
+}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def login(client, username):
+    with client.session_transaction() as sess:
+        sess['username'] = username
+
+
+def run_job(client, services, usns):
+    response = client.post('/run_check_and_combine', data={'student_ids': ','.join(usns)},
+                           headers={'Accept': 'application/json'})
+    if response.status_code != 202:
+        raise RuntimeError(f'submit failed: {response.status_code} {response.get_data(as_text=True)}')
+    job = services.get_job_manager().get(response.get_json()['job_id'])
+    while job.active:
+        time.sleep(0.02)
+    if job.status != 'done':
+        raise RuntimeError(f'job {job.id} ended {job.status}: {job.error}')
+    return job
+
+
+def parquet_seconds(store, tmp):
+    try:
+        frame = store.load_display()
+        seconds, _ = timed(lambda: frame.to_parquet(os.path.join(tmp, 'results.parquet'), index=False))
+    except ImportError:
+        return None
+    return seconds
+
+
+def bench(client, services, usns, tmp, warm_repeat=5):
+    username = f'bench-{len(usns)}-{uuid.uuid4().hex[:6]}'
+    login(client, username)
+    workspace = services.workspaces.user(username)
+    try:
+        e2e, _ = timed(lambda: run_job(client, services, usns))
+
+        archive = services.get_page_archive(username)
+        paths = [archive.path_for(fetch['digest']) for fetch in archive.latest()]
+        parse, parsed = timed(lambda: list(parse_blobs(services, paths)))
+        failed = sum(1 for _, marks, error in parsed if error is not None or not marks)
+
+        xlsx, response = timed(lambda: client.get('/download_excel?format=xlsx').get_data())
+        csv, _ = timed(lambda: client.get('/download_excel?format=csv').get_data())
+
+        cold, response = timed(lambda: client.get('/visualize_data'))
+        if response.status_code != 200:
+            raise RuntimeError(f'/visualize_data returned {response.status_code}')
+        warm = statistics.median(timed(lambda: client.get('/visualize_data'))[0] for _ in range(warm_repeat))
+
+        return {
+            'students': len(usns),
+            'stored': services.get_results_store(username).usn_count(),
+            'parse_failures': failed,
+            'e2e_seconds': e2e,
+            'usns_per_min': len(usns) / e2e * 60 if e2e else None,
+            'parse_seconds': parse,
+            'parse_pages_per_sec': len(paths) / parse if parse else None,
+            'xlsx_seconds': xlsx,
+            'csv_seconds': csv,
+            'parquet_seconds': parquet_seconds(services.get_results_store(username), tmp),
+            'visualize_cold_seconds': cold,
+            'visualize_warm_seconds': warm,
+        }
+    finally:
+        shutil.rmtree(workspace.path, ignore_errors=True)
+
+
+def start_operator(captcha_queue, delay):
+    """Answer queued captchas from a daemon thread, as a quick typist would; returns its stop event."""
+    stop = threading.Event()
+
+    def answer_forever():
+        while not stop.wait(0.005):
+            now = time.time()
+            for pending in captcha_queue.pending():
+                if now - pending.created_at >= delay:
+                    captcha_queue.answer(pending.id, FakeDriver.captcha_answer)
+    operator = threading.Thread(target=answer_forever, name='bench-operator', daemon=True)
+    operator.start()
+    return stop, operator
+
+
+def environment(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'latency': args.latency,
+        'sessions': args.sessions,
+        'poll': args.poll,
+        'captcha_mode': args.captcha_mode,
+        'captcha_delay': args.captcha_delay,
+        'rate': args.rate,
+        'pages': args.pages,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print per-metric changes; returns the list of regressions."""
+    old_runs = {run['students']: run for run in baseline['runs']}
+    regressions = []
+    print(f"\nAgainst {baseline.get('saved_as', 'baseline')} (commit {baseline['environment'].get('commit')}):")
+    for run in current['runs']:
+        old = old_runs.get(run['students'])
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            new_value, old_value = run.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value * 100
+            worse = -change if higher_is_better else change
+            flag = '  REGRESSION' if worse > threshold else ''
+            print(f"{run['students']:>6} {metric:<24} {old_value:>10.4f} -> {new_value:>10.4f} ({change:+.1f}%){flag}")
+            if flag:
+                regressions.append((run['students'], metric, change))
+    return regressions
+
+
+def latest_result():
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, 'pipeline-*.json')))
+    return files[-1] if files else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 5000])
+    parser.add_argument('--pages', help='Directory of recorded page_<usn>.html files; synthetic pages otherwise.')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds per page load and per submit.')
+    parser.add_argument('--captcha-delay', type=float, default=0.0, help='Seconds the "operator" takes per captcha.')
+    parser.add_argument('--sessions', type=int, default=4, help='Browser sessions / scrape workers.')
+    parser.add_argument('--poll', type=float, default=0.01, help='waits.POLL_FREQUENCY during the run.')
+    parser.add_argument('--captcha-mode', choices=['browser', 'queue'], default='browser')
+    parser.add_argument('--rate', type=float, default=0.0, help='Requests/sec allowed to the results host.')
+    parser.add_argument('--compare', help="Baseline JSON to compare against, or 'latest'.")
+    parser.add_argument('--threshold', type=float, default=20.0, help='Regression threshold in percent.')
+    parser.add_argument('--log-level', default='WARNING', help="The app's log level during the run.")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    baseline_path = latest_result() if args.compare == 'latest' else args.compare
+
+    if args.pages:
+        pages = PageSource.from_directory(args.pages)
+    else:
+        pages = PageSource.synthetic(max(args.sizes))
+    all_usns = pages.usns()
+    if len(all_usns) < max(args.sizes):
+        parser.error(f'only {len(all_usns)} recorded page(s) for a cohort of {max(args.sizes)}')
+
+    waits.POLL_FREQUENCY = args.poll
+    runs = []
+    print(f"{'students':>9} {'USNs/min':>9} {'pages/s':>8} {'xlsx':>8} {'csv':>8} {'parquet':>8} "
+          f"{'viz cold':>9} {'viz warm':>9}")
+    # Users, jobs and archives go to a scratch tree, never into a live server's results/.
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'RESULTS_DIR': os.path.join(tmp, 'results'),
+            'DOWNLOAD_DIR': os.path.join(tmp, 'downloads'),
+            'DRIVER_FACTORY': lambda: FakeDriver(pages, latency=args.latency, captcha_delay=args.captcha_delay),
+            'DRIVER_POOL_SIZE': args.sessions,
+            'JOB_WORKERS': args.sessions,
+            'CAPTCHA_MODE': args.captcha_mode,
+            'RATE_LIMIT_PER_SECOND': args.rate,
+            'LOG_LEVEL': args.log_level,
+        })
+        services = app.extensions['vtu']
+        operator = None
+        if args.captcha_mode == 'queue':
+            operator = start_operator(services.captcha_queue, args.captcha_delay)
+        client = app.test_client()
+
+        for count in args.sizes:
+            r = bench(client, services, all_usns[:count], tmp)
+            runs.append(r)
+            parquet = f"{r['parquet_seconds']:>7.3f}s" if r['parquet_seconds'] is not None else f"{'n/a':>8}"
+            print(f"{r['students']:>9} {r['usns_per_min']:>9.0f} {r['parse_pages_per_sec']:>8.0f} "
+                  f"{r['xlsx_seconds']:>7.3f}s {r['csv_seconds']:>7.3f}s {parquet} "
+                  f"{r['visualize_cold_seconds']:>8.3f}s {r['visualize_warm_seconds']:>8.4f}s")
+        services.get_job_manager().shutdown(wait=True)
+        if operator is not None:
+            stop, thread = operator
+            stop.set()
+            thread.join()
+
+    result = {'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment(args), 'runs': runs}
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        result['saved_as'] = os.path.relpath(path, ROOT)
+        with open(path, 'w', encoding='utf-8') as fp:
+            json.dump(result, fp, indent=2)
+        print(f"\nSaved {result['saved_as']}")
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as fp:
+            baseline = json.load(fp)
+        if compare(result, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Web worker startup cost: import + app creation time, first request, resident memory.
+
+    python benchmarks/bench_startup.py --baseline REF [--repeat 5]
+
+The working tree and ``--baseline`` (any git ref, extracted with
+``git archive``) are each copied to a temporary directory and started in
+fresh interpreters ``--repeat`` times. To measure the app factory and
+lazy imports, use the commit before ``create_app()`` was added::
+
+    python benchmarks/bench_startup.py \
+        --baseline "$(git log -S 'def create_app' --format=%h -- app.py | tail -1)~1"
+
+Each run records:
+
+* seconds to import the app module and build the app
+* seconds for the first GET /login
+* resident memory after that request (VmRSS) and its peak (ru_maxrss)
+* which heavy third-party packages ended up in ``sys.modules``
+
+Medians are printed side by side. Either tree may expose ``create_app()``
+or a module-level ``app``.
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ('selenium', 'lxml', 'pandas', 'numpy', 'plotly', 'openpyxl')
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app as module
+app = module.create_app() if hasattr(module, 'create_app') else module.app
+created = time.perf_counter()
+response = app.test_client().get('/login')
+served = time.perf_counter()
+rss = 0
+with open('/proc/self/status') as fp:
+    for line in fp:
+        if line.startswith('VmRSS:'):
+            rss = int(line.split()[1]) * 1024
+print(json.dumps({
+    'status': response.status_code,
+    'create_seconds': created - start,
+    'first_request_seconds': served - created,
+    'rss_bytes': rss,
+    'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    'heavy_modules': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY,)
+
+METRICS = ('create_seconds', 'first_request_seconds', 'rss_bytes', 'peak_rss_bytes')
+
+
+def copy_working_tree(dest):
+    shutil.copytree(ROOT, dest, ignore=shutil.ignore_patterns(
+        '.git', '__pycache__', 'results', 'downloads', '*.pyc'))
+
+
+def extract_ref(ref, dest):
+    archive = subprocess.run(['git', 'archive', '--format=tar', ref], cwd=ROOT,
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest, filter='data')
+
+
+def probe(tree):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=tree, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(tree, repeat):
+    probe(tree)  # warm the OS file cache so every tree starts on equal terms
+    runs = [probe(tree) for _ in range(repeat)]
+    summary = {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+    summary['heavy_modules'] = runs[-1]['heavy_modules']
+    summary['status'] = runs[-1]['status']
+    return summary
+
+
+def _format(metric, value):
+    if metric.endswith('bytes'):
+        return f'{value / 2**20:8.1f} MB'
+    return f'{value * 1000:8.0f} ms'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', required=True, help='Git ref to compare against.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='Print the raw medians as JSON.')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_dir = os.path.join(tmp, 'baseline')
+        current_dir = os.path.join(tmp, 'current')
+        os.makedirs(baseline_dir)
+        extract_ref(args.baseline, baseline_dir)
+        copy_working_tree(current_dir)
+        baseline = measure(baseline_dir, args.repeat)
+        current = measure(current_dir, args.repeat)
+
+    if args.json:
+        print(json.dumps({'baseline': baseline, 'current': current}, indent=2))
+        return 0
+    print(f"{'':<22} {args.baseline:>11} {'working tree':>13} {'change':>8}")
+    for metric in METRICS:
+        old, new = baseline[metric], current[metric]
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{metric:<22} {_format(metric, old):>11} {_format(metric, new):>13} {change:+7.0f}%")
+    print(f"{'heavy modules':<22} {', '.join(baseline['heavy_modules']) or '-'}")
+    print(f"{'':<22} -> {', '.join(current['heavy_modules']) or '-'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Write/load times of the SQLite results store against the old Excel round trip.
+
+    python benchmarks/bench_store.py [--sizes 100 1000 5000]
+
+For each cohort size the same random results are written as
+results_table.xlsx (``to_excel``) and read back with ``read_excel``, as the
+routes used to do, and written to / loaded from :class:`ResultsStore`.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+import corpus  # noqa: E402
+from results_store import ResultsStore  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def make_results(count, seed=0):
+    rng = random.Random(seed)
+    return {corpus.make_usn(i % 1000, year=21 + i // 1000): corpus.random_marks(rng) for i in range(count)}
+
+
+def bench(count, tmp):
+    data = make_results(count)
+    subjects = sorted({subject for marks in data.values() for subject in marks})
+    frame = pd.DataFrame([{'USN': usn, **{s: marks.get(s, '-') for s in subjects}} for usn, marks in data.items()])
+
+    xlsx_path = os.path.join(tmp, f'results_table_{count}.xlsx')
+    xlsx_write, _ = timed(lambda: frame.to_excel(xlsx_path, index=False))
+    xlsx_read, _ = timed(lambda: pd.read_excel(xlsx_path))
+
+    store = ResultsStore(os.path.join(tmp, f'results_{count}.sqlite3'))
+    store_write, _ = timed(lambda: store.write_results(data, replace=True))
+    store_marks, _ = timed(store.load_marks)
+    store_display, _ = timed(store.load_display)
+    return {
+        'students': count,
+        'xlsx_write': xlsx_write,
+        'xlsx_read': xlsx_read,
+        'store_write': store_write,
+        'store_load_marks': store_marks,
+        'store_load_display': store_display,
+        'xlsx_bytes': os.path.getsize(xlsx_path),
+        'store_bytes': os.path.getsize(store.db_path),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args(argv)
+
+    print(f"{'students':>9} {'xlsx write':>11} {'xlsx read':>10} {'store write':>12} "
+          f"{'load marks':>11} {'load display':>13} {'xlsx KB':>8} {'store KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.sizes:
+            r = bench(count, tmp)
+            print(f"{r['students']:>9} {r['xlsx_write']:>10.3f}s {r['xlsx_read']:>9.3f}s "
+                  f"{r['store_write']:>11.3f}s {r['store_load_marks']:>10.3f}s "
+                  f"{r['store_load_display']:>12.3f}s {r['xlsx_bytes'] // 1024:>8} {r['store_bytes'] // 1024:>9}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Synthetic VTU result pages for benchmarks when no saved pages are at hand.
+
+Pages mimic the two layouts the parser understands: the ``divTableRow``
+layout the live site serves and the older ``<table class="table">`` one,
+with enough surrounding markup to be close to real page sizes.
+"""
+import os
+import random
+
+
+SUBJECTS = [
+    ('21CS51', 'Automata Theory and Compiler Design'),
+    ('21CS52', 'Computer Networks'),
+    ('21CS53', 'Database Management Systems'),
+    ('21CS54', 'Artificial Intelligence and Machine Learning'),
+    ('21CSL55', 'Database Management Systems Laboratory with Mini Project'),
+    ('21RMI56', 'Research Methodology and Intellectual Property Rights'),
+    ('21CIV57', 'Environmental Studies'),
+    ('21CSL581', 'Angular JS and Node JS'),
+    ('21CS61', 'Software Engineering and Project Management'),
+    ('21CS62', 'Fullstack Development'),
+    ('21CS63', 'Computer Graphics and Fundamentals of Image Processing'),
+    ('21CS642', 'Advanced Java Programming'),
+]
+
+_HEAD = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>VTU Results</title>
+<link rel="stylesheet" href="css/bootstrap.min.css"><link rel="stylesheet" href="css/style.css">
+<script src="js/jquery.min.js"></script><script src="js/bootstrap.min.js"></script>
+</head><body>
+<nav class="navbar navbar-default"><div class="container"><ul class="nav navbar-nav">
+{nav}
+</ul></div></nav>
+<div class="container"><div class="row"><div class="col-md-12">
+<table class="details"><tr><td><b>University Seat Number</b></td><td> : {usn}</td></tr>
+<tr><td><b>Student Name</b></td><td> : STUDENT {usn}</td></tr></table>
+<div class="row"><div class="col-md-12"><b>Semester : 5</b></div></div>
+"""
+
+_TAIL = """</div></div></div>
+<footer class="footer"><div class="container"><p>Copyright &copy; Visvesvaraya Technological University</p>
+{links}
+</div></footer></body></html>
+"""
+
+
+def _nav():
+    return '\n'.join(f'<li><a href="#link{i}">Menu item {i}</a></li>' for i in range(40))
+
+
+def _links():
+    return '\n'.join(f'<p><a href="#footer{i}">Footer link {i}</a> | Notice {i}</p>' for i in range(40))
+
+
+def random_marks(rng, subjects=SUBJECTS, absent_rate=0.03):
+    marks = {}
+    for code, _ in rng.sample(subjects, k=rng.randint(7, len(subjects))):
+        roll = rng.random()
+        if roll < absent_rate:
+            marks[code] = 'AB'
+        elif roll < absent_rate * 1.5:
+            marks[code] = 'NE'
+        else:
+            marks[code] = str(rng.randint(10, 60))
+    return marks
+
+
+def make_page(usn, marks, layout='div'):
+    names = dict(SUBJECTS)
+    parts = [_HEAD.format(nav=_nav(), usn=usn)]
+    if layout == 'table':
+        parts.append('<table class="table table-bordered"><tr><th>Sl. No.</th><th>Subject Code</th>'
+                     '<th>Subject Name</th><th>Internal Marks</th><th>External Marks</th>'
+                     '<th>Total</th><th>Result</th></tr>\n')
+        for i, (code, mark) in enumerate(marks.items(), 1):
+            internal = random.Random(usn + code).randint(30, 50)
+            parts.append(f'<tr><td>{i}</td><td> {code} </td><td>{names.get(code, code)}</td>'
+                         f'<td>{internal}</td><td><span> {mark} </span></td><td>-</td><td>P</td></tr>\n')
+        parts.append('</table>\n')
+    else:
+        parts.append('<div class="divTable"><div class="divTableBody">\n'
+                     '<div class="divTableRow"><div class="divTableCell"><b>Subject Code</b></div>'
+                     '<div class="divTableCell"><b>Subject Name</b></div>'
+                     '<div class="divTableCell"><b>Internal Marks</b></div>'
+                     '<div class="divTableCell"><b>External Marks</b></div>'
+                     '<div class="divTableCell"><b>Total</b></div>'
+                     '<div class="divTableCell"><b>Result</b></div>'
+                     '<div class="divTableCell"><b>Announced / Updated on</b></div></div>\n')
+        for code, mark in marks.items():
+            internal = random.Random(usn + code).randint(30, 50)
+            parts.append(f'<div class="divTableRow"><div class="divTableCell">{code}</div>'
+                         f'<div class="divTableCell">{names.get(code, code)}</div>'
+                         f'<div class="divTableCell">{internal}</div>'
+                         f'<div class="divTableCell">-</div>'
+                         f'<div class="divTableCell"><b>{mark}</b></div>'
+                         f'<div class="divTableCell">P</div>'
+                         f'<div class="divTableCell">2024-02-15</div></div>\n')
+        parts.append('</div></div>\n')
+    parts.append(_TAIL.format(links=_links()))
+    return ''.join(parts)
+
+
+def make_usn(i, college='CR', year=21, branch='IS'):
+    return f'1{college}{year}{branch}{i:03d}'
+
+
+def write_corpus(directory, count, seed=0, layouts=('div', 'table')):
+    """Write ``count`` pages as ``page_<usn>.html``; returns {usn: marks}."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    expected = {}
+    branches = ['IS', 'CS', 'EC', 'ME']
+    for i in range(count):
+        usn = make_usn(i % 1000, branch=branches[(i // 1000) % len(branches)], year=21 + i // 4000)
+        marks = random_marks(rng)
+        layout = layouts[i % len(layouts)]
+        with open(os.path.join(directory, f'page_{usn}.html'), 'w', encoding='utf-8') as fp:
+            fp.write(make_page(usn, marks, layout))
+        expected[usn] = marks
+    return expected
@@ -0,0 +1,229 @@
+"""Offline stand-in for results.vtu.ac.in: a fake WebDriver that replays pages.
+
+``FakeDriver`` implements the slice of the Selenium API that
+``scrape_usn`` and waits.py use. It serves the USN form, "solves" the
+captcha after ``captcha_delay`` seconds as an operator would, and answers a
+submit with the recorded page for that USN after ``latency`` seconds, or
+with the site's "Invalid USN" page for USNs it has no page for.
+
+In CAPTCHA_MODE 'queue' the app types the answer itself; anything but
+``FakeDriver.captcha_answer`` gets the site's "invalid captcha" alert.
+
+Use it as the app's driver factory::
+
+    pages = PageSource.synthetic(100)
+    app = create_app({'DRIVER_FACTORY': lambda: FakeDriver(pages, latency=0.2)})
+"""
+import os
+import random
+import threading
+import time
+
+from lxml import html
+from selenium.common.exceptions import NoAlertPresentException, NoSuchElementException
+from selenium.webdriver.common.by import By
+
+import corpus
+
+
+FORM_PAGE = """<!DOCTYPE html>
+<html><head><title>VTU Results</title></head><body>
+<form action="resultpage.php" method="post">
+<input type="text" name="lns"><input type="text" name="captchacode">
+<img src="captcha/vtu_captcha.php" alt="captcha">
+<input type="submit" id="submit" value="SUBMIT">
+</form></body></html>
+"""
+
+INVALID_PAGE = """<!DOCTYPE html>
+<html><head><title>VTU Results</title></head><body>
+<p>University Seat Number is not available or Invalid..!</p>
+</body></html>
+"""
+
+
+class PageSource:
+    """Thread-safe ``{usn: page html}`` mapping shared by every FakeDriver."""
+
+    def __init__(self, pages):
+        self.pages = dict(pages)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, directory):
+        """Load recorded ``page_<usn>.html`` files, e.g. from an old results/page."""
+        pages = {}
+        for name in os.listdir(directory):
+            if name.startswith('page_') and name.endswith('.html'):
+                with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='replace') as fp:
+                    pages[name[len('page_'):-len('.html')]] = fp.read()
+        return cls(pages)
+
+    @classmethod
+    def synthetic(cls, count, seed=0, layouts=('div', 'table')):
+        """``count`` generated pages alternating between both layouts."""
+        rng = random.Random(seed)
+        branches = ['IS', 'CS', 'EC', 'ME']
+        pages = {}
+        for i in range(count):
+            usn = corpus.make_usn(i % 1000, branch=branches[(i // 1000) % len(branches)], year=21 + i // 4000)
+            pages[usn] = corpus.make_page(usn, corpus.random_marks(rng), layouts[i % len(layouts)])
+        return cls(pages)
+
+    def usns(self):
+        return list(self.pages)
+
+    def get(self, usn):
+        with self._lock:
+            return self.pages.get(usn)
+
+
+# A 1x1 PNG stands in for the captcha image.
+CAPTCHA_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000b49444154789c63f80f040009fb03fdfb5e6b2b0000000049454e44ae426082')
+
+
+class FakeElement:
+    def __init__(self, driver, name):
+        self.driver = driver
+        self.name = name
+
+    @property
+    def screenshot_as_png(self):
+        return CAPTCHA_PNG
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def send_keys(self, *values):
+        self.driver._inputs[self.name] = self.driver._inputs.get(self.name, '') + ''.join(values)
+
+    def clear(self):
+        self.driver._inputs[self.name] = ''
+
+    def get_attribute(self, name):
+        if name != 'value':
+            return None
+        if self.name == 'captchacode' and self.driver._captcha_ready():
+            return self.driver.captcha_answer
+        return self.driver._inputs.get(self.name, '')
+
+    def click(self):
+        if self.name == 'submit':
+            self.driver._submit()
+
+
+class FakeAlert:
+    def __init__(self, driver, text):
+        self.driver = driver
+        self.text = text
+
+    def accept(self):
+        self.driver._alert = None
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    @property
+    def alert(self):
+        if self.driver._alert is None:
+            raise NoAlertPresentException()
+        return FakeAlert(self.driver, self.driver._alert)
+
+
+class FakeDriver:
+    """Replays ``pages`` with a configurable per-request ``latency``."""
+
+    result_url = 'https://results.vtu.ac.in/replay/resultpage.php'
+    captcha_answer = 'R3PL4Y'
+
+    def __init__(self, pages, latency=0.0, captcha_delay=0.0, jitter=0.0, seed=None):
+        self.pages = pages
+        self.latency = latency
+        self.captcha_delay = captcha_delay
+        self.jitter = jitter
+        self.switch_to = _SwitchTo(self)
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._url = 'about:blank'
+        self._source = '<html></html>'
+        self._tree = None
+        self._inputs = {}
+        self._form_loaded_at = None
+        self._alert = None
+
+    def _sleep(self):
+        self.requests += 1
+        delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _load(self, url, source):
+        self._url = url
+        self._source = source
+        self._tree = None
+
+    def _captcha_ready(self):
+        return (self._form_loaded_at is not None
+                and time.monotonic() - self._form_loaded_at >= self.captcha_delay)
+
+    def _submit(self):
+        self._sleep()
+        typed = self._inputs.get('captchacode')
+        if typed is not None and typed.strip() != self.captcha_answer:
+            self._alert = 'Please enter valid captcha code'
+            return
+        page = self.pages.get(self._inputs.get('lns', '').strip())
+        self._load(self.result_url, page if page is not None else INVALID_PAGE)
+        self._form_loaded_at = None
+
+    # Selenium WebDriver API used by the app.
+
+    def get(self, url):
+        self._sleep()
+        self._load(url, FORM_PAGE)
+        self._inputs = {}
+        self._alert = None
+        self._form_loaded_at = time.monotonic()
+
+    @property
+    def current_url(self):
+        return self._url
+
+    @property
+    def page_source(self):
+        return self._source
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        pass
+
+    def find_elements(self, by, value):
+        if self._form_loaded_at is not None:
+            if (by, value) in ((By.NAME, 'lns'), (By.NAME, 'captchacode'), (By.ID, 'submit')):
+                return [FakeElement(self, value)]
+            if by == By.XPATH and 'captcha' in value:
+                return [FakeElement(self, 'captcha_image')]
+            return []
+        if by == By.XPATH:
+            if self._tree is None:
+                self._tree = html.fromstring(self._source)
+            return [FakeElement(self, 'result') for _ in self._tree.xpath(value)]
+        return []
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f'{by}={value}')
+        return elements[0]
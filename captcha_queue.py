@@ -0,0 +1,200 @@
+"""Captchas waiting for an operator, handed off from headless browser sessions.
+
+A scrape worker that reaches the captcha posts the image with
+:meth:`CaptchaQueue.submit` and blocks on :meth:`CaptchaRequest.wait`; the
+web UI lists :meth:`CaptchaQueue.pending` and answers through
+:meth:`CaptchaQueue.answer`. Other sessions keep loading pages meanwhile.
+
+Requests live in ``<root>/captchas.sqlite3`` with each image in its own
+file beside it, so any worker process can list and answer a captcha that
+another process's scrape is waiting on. The waiting worker polls for the
+answer; one given in its own process wakes it at once.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+from workspace import atomic_write
+
+
+PENDING = 'pending'
+ANSWERED = 'answered'
+SKIPPED = 'skipped'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captchas (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    job_id TEXT,
+    usn TEXT NOT NULL,
+    mimetype TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    answer TEXT
+);
+CREATE INDEX IF NOT EXISTS captchas_owner ON captchas (owner, created_at);
+"""
+
+_COLUMNS = ('id', 'owner', 'job_id', 'usn', 'mimetype', 'created_at')
+
+
+class CaptchaRequest:
+    def __init__(self, queue, id, owner, job_id, usn, mimetype, created_at):
+        self.queue = queue
+        self.id = id
+        self.owner = owner
+        self.job_id = job_id
+        self.usn = usn
+        self.mimetype = mimetype
+        self.created_at = created_at
+        self.answer = None
+        self.skipped = False
+        self._event = threading.Event()
+
+    @property
+    def image(self):
+        with open(self.queue.image_path(self.id), 'rb') as fp:
+            return fp.read()
+
+    @property
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until answered; returns the answer, or None if skipped or timed out."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._event.is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            poll = self.queue.poll_interval
+            if self._event.wait(poll if remaining is None else min(poll, remaining)):
+                break
+            state, answer = self.queue._state(self.id)
+            if state != PENDING:
+                self.answer = answer
+                self.skipped = state == SKIPPED
+                self._event.set()
+        return self.answer
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_id': self.job_id,
+            'usn': self.usn,
+            'created_at': self.created_at,
+            'age': round(time.time() - self.created_at, 1),
+        }
+
+
+class CaptchaQueue:
+    """Shared queue under ``root``; requests older than ``max_age`` seconds are dropped.
+
+    ``max_age`` should be at least the captcha wait timeout. A request
+    outlives it only if its worker died without withdrawing it.
+    """
+
+    def __init__(self, root, max_age=600, poll_interval=0.25):
+        self.root = root
+        self.db_path = os.path.join(root, 'captchas.sqlite3')
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        # Requests this process is waiting on, woken directly when answered here.
+        self._waiting = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    def image_path(self, request_id):
+        return os.path.join(self.root, f'{request_id}.img')
+
+    def submit(self, owner, job_id, usn, image, mimetype='image/png'):
+        request = CaptchaRequest(self, uuid.uuid4().hex[:12], owner, job_id, usn, mimetype, time.time())
+        atomic_write(self.image_path(request.id), image)
+        with self._connect() as conn:
+            conn.execute(f"INSERT INTO captchas ({', '.join(_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                         (request.id, owner, job_id, usn, mimetype, request.created_at))
+        with self._lock:
+            self._waiting[request.id] = request
+        self._expire()
+        return request
+
+    def _requests(self, where, params):
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM captchas WHERE state = ? "
+                                f"AND created_at >= ? {where} ORDER BY created_at",
+                                (PENDING, time.time() - self.max_age) + params).fetchall()
+        return [CaptchaRequest(self, *row) for row in rows]
+
+    def get(self, request_id, owner=None):
+        if owner is None:
+            requests = self._requests('AND id = ?', (request_id,))
+        else:
+            requests = self._requests('AND id = ? AND owner = ?', (request_id, owner))
+        return requests[0] if requests else None
+
+    def pending(self, owner=None):
+        """Unanswered captchas, oldest first."""
+        if owner is None:
+            return self._requests('', ())
+        return self._requests('AND owner = ?', (owner,))
+
+    def _state(self, request_id):
+        with self._connect() as conn:
+            row = conn.execute('SELECT state, answer FROM captchas WHERE id = ?', (request_id,)).fetchone()
+        # A withdrawn request reads as skipped.
+        return row if row is not None else (SKIPPED, None)
+
+    def _resolve(self, request_id, owner, answer, state):
+        query = 'UPDATE captchas SET state = ?, answer = ? WHERE id = ? AND state = ?'
+        params = (state, answer, request_id, PENDING)
+        if owner is not None:
+            query += ' AND owner = ?'
+            params += (owner,)
+        with self._connect() as conn:
+            resolved = conn.execute(query, params).rowcount > 0
+        if resolved:
+            with self._lock:
+                request = self._waiting.get(request_id)
+            if request is not None:
+                request.answer = answer
+                request.skipped = state == SKIPPED
+                request._event.set()
+        return resolved
+
+    def answer(self, request_id, text, owner=None):
+        return self._resolve(request_id, owner, text, ANSWERED)
+
+    def skip(self, request_id, owner=None):
+        return self._resolve(request_id, owner, None, SKIPPED)
+
+    def withdraw(self, request):
+        """Drop a request once its worker stops waiting (answered, timed out, cancelled)."""
+        with self._lock:
+            self._waiting.pop(request.id, None)
+        with self._connect() as conn:
+            conn.execute('DELETE FROM captchas WHERE id = ?', (request.id,))
+        self._remove_image(request.id)
+
+    def _remove_image(self, request_id):
+        try:
+            os.remove(self.image_path(request_id))
+        except FileNotFoundError:
+            pass
+
+    def _expire(self):
+        # Left behind by workers that died while waiting.
+        with self._connect() as conn:
+            cutoff = time.time() - self.max_age
+            stale = [row[0] for row in conn.execute('SELECT id FROM captchas WHERE created_at < ?', (cutoff,))]
+            conn.execute('DELETE FROM captchas WHERE created_at < ?', (cutoff,))
+        for request_id in stale:
+            self._remove_image(request_id)
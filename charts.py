@@ -0,0 +1,61 @@
+"""Plotly figures for a semester view, prebuilt as JSON and cached per data version.
+
+Figures are drawn from the compact aggregates in stats.py rather than from
+raw marks, so their size depends on subjects and bins, not on cohort size.
+"""
+import plotly.graph_objs as go
+
+
+FIGURES = ('line', 'heatmap', 'hist')
+
+
+def _json(fig):
+    # The JSON is embedded in a <script> block, so it must not close it early.
+    return fig.to_json().replace('</', '<\\/')
+
+
+def _bin_labels(histogram):
+    edges = histogram['edges']
+    return [f'{int(lo)}-{int(hi)}' for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def build_line(stats):
+    subjects = [entry['subject'] for entry in stats['subjects']]
+    p25 = [entry['percentiles'].get('25') for entry in stats['subjects']]
+    p75 = [entry['percentiles'].get('75') for entry in stats['subjects']]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=subjects, y=p25, mode='lines', line={'width': 0}, name='25th percentile', showlegend=False))
+    fig.add_trace(go.Scatter(x=subjects, y=p75, mode='lines', line={'width': 0}, fill='tonexty', name='25th-75th percentile'))
+    fig.add_trace(go.Scatter(x=subjects, y=[entry['mean'] for entry in stats['subjects']], mode='lines+markers', name='Mean'))
+    fig.add_trace(go.Scatter(x=subjects, y=[entry['median'] for entry in stats['subjects']], mode='lines+markers', name='Median'))
+    fig.update_layout(title='Marks Visualization (Subject Averages)', xaxis_title='Subjects', yaxis_title='Marks', xaxis={'type': 'category'})
+    return fig
+
+
+def build_heatmap(stats):
+    histogram = stats['histogram']
+    subjects = list(histogram['counts'])
+    fig = go.Figure(data=go.Heatmap(
+        z=[histogram['counts'][subject] for subject in subjects], x=_bin_labels(histogram), y=subjects,
+        colorscale='Viridis', colorbar=dict(title='Students'), hoverongaps=False
+    ))
+    fig.update_layout(title='Marks Heatmap (Students per Mark Range)', xaxis_title='Marks', yaxis_title='Subject', xaxis={'type': 'category'}, yaxis={'type': 'category', 'autorange': 'reversed'})
+    return fig
+
+
+def build_hist(stats):
+    histogram = stats['histogram']
+    labels = _bin_labels(histogram)
+    fig = go.Figure()
+    for subject, counts in histogram['counts'].items():
+        if any(counts):
+            fig.add_trace(go.Bar(x=labels, y=counts, name=subject, opacity=0.75))
+    fig.update_layout(title='Marks Distribution (Histogram)', xaxis_title='Marks', yaxis_title='Frequency', barmode='overlay')
+    return fig
+
+
+BUILDERS = {'line': build_line, 'heatmap': build_heatmap, 'hist': build_hist}
+
+
+def build_figures(stats):
+    return {name: _json(BUILDERS[name](stats)) for name in FIGURES}
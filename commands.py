@@ -0,0 +1,62 @@
+import os
+
+import click
+from flask import Blueprint
+
+from services import get_services
+
+
+bp = Blueprint('commands', __name__, cli_group=None)
+
+
+@bp.cli.command('purge-parse-cache')
+@click.option('--missing-only', is_flag=True, help='Only drop entries whose page is no longer archived.')
+def purge_parse_cache_command(missing_only):
+    """Remove cached page parses for every user."""
+    from page_archive import PageArchive
+    from parse_cache import ParseCache
+    import result_parser
+
+    removed = 0
+    for user_dir in get_services().workspaces.user_dirs():
+        cache_path = os.path.join(user_dir, 'parse_cache.sqlite3')
+        if not os.path.exists(cache_path):
+            continue
+        cache = ParseCache(cache_path, result_parser.PARSER_VERSION)
+        if missing_only:
+            removed += cache.forget_missing(PageArchive(os.path.join(user_dir, 'archive')).digests())
+        else:
+            removed += cache.purge()
+    print(f"Removed {removed} cached parse(s).")
+
+
+@bp.cli.command('reparse-archive')
+@click.argument('username')
+@click.option('--session', 'exam', default=None, help='Only use pages from this exam session.')
+def reparse_archive_command(username, exam):
+    """Rebuild USERNAME's results from their newest archived page per USN."""
+    from ingest import parse_archived
+
+    services = get_services()
+    fetches = services.get_page_archive(username).latest(session=exam)
+    if not fetches:
+        print('No archived pages found.')
+        return
+    data = parse_archived(services, username, fetches)
+    version = services.get_results_store(username).write_results(data, replace=True)
+    print(f"Stored results for {len(data)} of {len(fetches)} archived USN(s) (version {version}).")
+
+
+@bp.cli.command('archive-stats')
+@click.argument('username')
+def archive_stats_command(username):
+    """Show how many pages USERNAME's archive holds and how much disk they take."""
+    info = get_services().get_page_archive(username).stats()
+    print(f"{info['fetches']} fetch(es), {info['blobs']} distinct page(s), "
+          f"{info['raw_bytes']} bytes raw, {info['stored_bytes']} bytes on disk.")
+
+
+@bp.cli.command('gc-workspaces')
+def gc_workspaces_command():
+    """Prune archived pages and downloads past WORKSPACE_RETENTION_DAYS."""
+    print(f"Removed {get_services().collect_workspace_garbage()} stale page(s)/download(s).")
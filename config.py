@@ -0,0 +1,69 @@
+import os
+
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+
+class DefaultConfig:
+    SECRET_KEY = 'your_very_secret_key_here_12345_CHANGE_ME'
+    # Users' workspaces, accounts and job records live under RESULTS_DIR.
+    RESULTS_DIR = os.path.join(BASE_DIR, 'results')
+    DOWNLOAD_DIR = os.path.join(BASE_DIR, 'downloads')
+    RESULTS_URL = 'https://results.vtu.ac.in/DJcbcs24/index.php'
+    # Accounts live in SQLite so every worker process shares them.
+    USER_DB_POOL_SIZE = 4
+    # Any werkzeug generate_password_hash method, e.g. 'scrypt' or 'pbkdf2:sha256:600000'.
+    PASSWORD_HASH_METHOD = 'scrypt'
+    # Successful logins are remembered briefly so repeat logins skip the hash.
+    LOGIN_CACHE_SIZE = 256
+    LOGIN_CACHE_TTL = 300
+    # Browser sessions are pooled and reused across USNs and requests; each
+    # JOB_WORKERS thread drives one session, so keep the two equal. Both are
+    # per server process.
+    DRIVER_POOL_SIZE = 4
+    DRIVER_MAX_USES = 25
+    DRIVER_ACQUIRE_TIMEOUT = 300
+    # Zero-argument callable returning a driver; None means a real Chrome session.
+    DRIVER_FACTORY = None
+    # Scrape jobs run in the background; these bound how much work runs at once.
+    JOB_WORKERS = 4
+    MAX_CONCURRENT_JOBS = 2
+    JOBS_PER_USER = 1
+    # Upper bounds (seconds) for each scrape phase; a phase ends as soon as the page is ready.
+    WAIT_TIMEOUTS = {'page_load': 20, 'captcha': 120, 'result': 30}
+    CAPTCHA_LENGTH = 6
+    # 'queue': sessions run headless and post captchas to /captcha for an operator to answer.
+    # 'browser': the operator types each captcha into the visible browser window.
+    CAPTCHA_MODE = 'queue'
+    # Requests per second (with bursts up to RATE_LIMIT_BURST) sent to the results
+    # host across all sessions and server processes sharing RESULTS_DIR; 0 disables the limit.
+    RATE_LIMIT_PER_SECOND = 1.0
+    RATE_LIMIT_BURST = 2
+    # Tries per USN; timeouts, browser errors and rejected captchas are retried with backoff.
+    SCRAPE_ATTEMPTS = 3
+    RETRY_BACKOFF_BASE = 2.0
+    RETRY_BACKOFF_CAP = 30.0
+    # Pages are parsed on a process pool once a batch has this many uncached files
+    # (and more than one worker); below that, pool startup outweighs the parsing.
+    PARALLEL_PARSE_MIN_FILES = 500
+    PARSE_WORKERS = None
+    CHART_CACHE_SIZE = 16
+    STATS_CACHE_SIZE = 64
+    # Marks are the 5th result column (out of MAX_MARK); 40 is the VTU pass mark.
+    PASS_MARK = 40
+    MAX_MARK = 100
+    STATS_BIN_WIDTH = 10
+    # Per-USN and per-page detail is logged at DEBUG and skipped entirely at INFO and above.
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Serve Prometheus metrics on /metrics.
+    METRICS_ENABLED = True
+    # Run directories and browser downloads older than this are garbage collected.
+    WORKSPACE_RETENTION_DAYS = 7
+    # Exam session recorded with every archived page; defaults to the results URL's path, e.g. 'DJcbcs24'.
+    EXAM_SESSION = None
+    # Semester/scheme views served by /view/<name>; add an entry per semester.
+    SEMESTER_VIEWS = {
+        '5': {'label': '5th Semester (2021 scheme)',
+              'subjects': ['21CIV57', '21CS51', '21CS52', '21CS53',
+                           '21CS54', '21CSL55', '21CSL581', '21RMI56']},
+    }
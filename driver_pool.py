@@ -0,0 +1,133 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class DriverPoolClosed(RuntimeError):
+    pass
+
+
+class _PooledDriver:
+    __slots__ = ('driver', 'uses')
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+def default_health_check(driver):
+    # Any round trip to the browser works; current_url is the cheapest one.
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """Bounded pool of WebDriver sessions.
+
+    Drivers are created lazily through ``factory`` (any zero-argument callable
+    returning a driver-like object, so tests can pass a fake), handed out with
+    :meth:`driver`, health-checked before reuse and recycled after
+    ``max_uses`` checkouts or whenever the caller's block raises.
+    """
+
+    def __init__(self, factory, max_size=2, max_uses=25, acquire_timeout=None,
+                 health_check=default_health_check):
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self._factory = factory
+        self._health_check = health_check
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def driver(self):
+        entry = self._checkout()
+        broken = False
+        try:
+            yield entry.driver
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self._checkin(entry, broken)
+
+    def _checkout(self):
+        deadline = None
+        if self.acquire_timeout is not None:
+            deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise DriverPoolClosed('driver pool has been shut down')
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._created < self.max_size:
+                        self._created += 1
+                        entry = None
+                        break
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError('timed out waiting for a free browser session')
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                try:
+                    return _PooledDriver(self._factory())
+                except BaseException:
+                    self._release_slot()
+                    raise
+
+            if self._health_check(entry.driver):
+                return entry
+            self._destroy(entry)
+
+    def _checkin(self, entry, broken):
+        entry.uses += 1
+        recycle = broken or (self.max_uses and entry.uses >= self.max_uses)
+        if not recycle:
+            try:
+                entry.driver.delete_all_cookies()
+            except Exception:
+                recycle = True
+        with self._cond:
+            if not recycle and not self._closed:
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._destroy(entry)
+
+    def _destroy(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def shutdown(self):
+        """Quit idle drivers and refuse new checkouts.
+
+        Drivers still checked out are quit when their block finishes.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for entry in idle:
+            self._destroy(entry)
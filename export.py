@@ -0,0 +1,114 @@
+from flask import (Blueprint, request, redirect, url_for, session, flash,
+                   Response, jsonify, abort, current_app)
+
+from auth import is_logged_in
+import exporter
+import metrics
+from services import get_services
+
+
+bp = Blueprint('export', __name__)
+
+
+def _export_format():
+    """The requested ``?format=`` download format; aborts with 400 for an unknown one."""
+    fmt = request.args.get('format', 'xlsx').lower()
+    if fmt not in exporter.FORMATS:
+        abort(400, f"Unsupported export format '{fmt}'.")
+    return fmt
+
+
+def _export_response(fmt, basename, version, header, rows):
+    """Stream ``rows`` as CSV or xlsx.
+
+    The ETag is derived from the user and their data version, so an
+    unchanged export is answered with 304 before ``rows`` is ever iterated.
+    """
+    etag = f"{basename}-{fmt}-{get_services().workspaces.user(session['username']).name}-v{version}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    if fmt == 'csv':
+        response = Response(exporter.iter_csv(header, rows), mimetype=exporter.CSV_MIMETYPE)
+    else:
+        with metrics.span('excel_write'):
+            spool, size = exporter.build_xlsx(header, rows)
+        response = Response(exporter.iter_file(spool), mimetype=exporter.XLSX_MIMETYPE)
+        response.content_length = size
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['Content-Disposition'] = f'attachment; filename={basename}.{fmt}'
+    return response
+
+
+def view_filters():
+    """The ``branch``, ``prefix`` and ``usns`` query filters, as ViewEngine.view takes them."""
+    usns = request.args.get('usns')
+    return {
+        'branch': request.args.get('branch'),
+        'prefix': request.args.get('prefix'),
+        'usns': [usn.strip().upper() for usn in usns.split(',') if usn.strip()] if usns else None,
+    }
+
+
+@bp.route('/view/<semester>')
+def semester_view(semester):
+    """One semester's subjects, optionally filtered by ``branch``, ``prefix`` or ``usns``.
+
+    ``?format=json`` (the default) returns the rows inline; ``xlsx`` and
+    ``csv`` return a download.
+    """
+    # views needs numpy, which full-table downloads never touch.
+    from views import UnknownView
+
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    try:
+        view = get_services().get_view_engine(session['username']).view(semester, **view_filters())
+    except UnknownView:
+        return jsonify({'error': f"Unknown semester view '{semester}'.",
+                        'views': sorted(current_app.config['SEMESTER_VIEWS'])}), 404
+    if request.args.get('format', 'json').lower() == 'json':
+        return jsonify(view.to_dict())
+    return _export_response(_export_format(), f'semester_{semester}', view.version, view.header, view.iter_rows())
+
+
+@bp.route('/a5thsem')
+def a5thsem():
+    if not is_logged_in():
+        flash('Please log in.', 'warning')
+        return redirect(url_for('auth.user_login'))
+
+    fmt = _export_format()
+    try:
+        view = get_services().get_view_engine(session['username']).view('5', **view_filters())
+        if view.missing_subjects:
+            flash(f"Warning: Some 5th sem columns not found in results: {', '.join(view.missing_subjects)}. Proceeding with available columns.", 'warning')
+        if not view.subjects or not len(view):
+            flash('No 5th sem results stored yet. Run "Check USNs & Generate Excel" first.', 'error')
+            return redirect(url_for('scraping.check_page'))
+
+        return _export_response(fmt, '5thsem', view.version, view.header, view.iter_rows())
+    except Exception as e:
+        current_app.logger.exception("Error in /a5thsem")
+        flash(f'Error generating 5th sem file: {str(e)}', 'error')
+        return redirect(url_for('scraping.check_page'))
+
+@bp.route('/download_excel')
+def download_excel():
+    if not is_logged_in():
+        flash('Please log in.', 'warning')
+        return redirect(url_for('auth.user_login'))
+    fmt = _export_format()
+    store = get_services().get_results_store(session['username'])
+    if store.usn_count() == 0:
+        flash('No results stored yet. Run "Check USNs & Generate Excel" first.', 'error')
+        return redirect(url_for('scraping.check_page'))
+    try:
+        return _export_response(fmt, 'results_table', store.version, ['USN'] + store.subjects(),
+                                store.iter_rows())
+    except Exception as e:
+        flash(f'Error downloading Excel: {str(e)}', 'error')
+        return redirect(url_for('scraping.check_page'))
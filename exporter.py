@@ -0,0 +1,71 @@
+"""Streaming CSV / xlsx encoders for result exports.
+
+Both take a header and an iterable of rows and produce ``bytes`` chunks, so
+a response can be sent without building a DataFrame or a file on disk that
+other requests could see.
+"""
+import csv
+import io
+import tempfile
+
+
+CSV_MIMETYPE = 'text/csv'
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+FORMATS = {'csv': CSV_MIMETYPE, 'xlsx': XLSX_MIMETYPE}
+
+CHUNK_SIZE = 64 * 1024
+# xlsx is a zip archive and can only be emitted once complete; it is built in
+# a private spooled file that moves to disk past this size.
+XLSX_SPOOL_BYTES = 1024 * 1024
+
+
+def iter_csv(header, rows, chunk_rows=500):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode('utf-8')
+
+
+def build_xlsx(header, rows, sheet_title='Results'):
+    """Write rows with openpyxl's write-only mode.
+
+    Returns ``(fileobj, size)`` with the spooled file rewound to the start.
+    """
+    # Imported here so CSV exports never pay for openpyxl.
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    spool = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES)
+    try:
+        workbook.save(spool)
+        size = spool.tell()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool, size
+
+
+def iter_file(fileobj, chunk_size=CHUNK_SIZE):
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
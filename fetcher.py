@@ -0,0 +1,163 @@
+"""Browser side of a scrape job: start Chrome, fetch one USN, retry.
+
+Only job worker threads import this module (selenium and the wait helpers
+come with it); the web routes hand ``scrape_task`` to the job manager.
+"""
+import logging
+import random
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support import expected_conditions as EC
+
+import metrics
+from throttle import backoff_delay
+import waits
+
+
+def make_chrome_driver(services):
+    chrome_options = webdriver.ChromeOptions()
+    prefs = {
+        "download.default_directory": services.download_dir,
+        "download.prompt_for_download": False,
+        "profile.default_content_settings.popups": 0,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+    if services.config['CAPTCHA_MODE'] == 'queue':
+        chrome_options.add_argument('--headless=new')
+    driver = webdriver.Chrome(options=chrome_options)
+    # Explicit waits in waits.py do the waiting; an implicit wait would stall every poll.
+    driver.implicitly_wait(0)
+    return driver
+
+
+def _throttle(services):
+    waited = services.get_rate_limiter().acquire(services.config['RESULTS_URL'])
+    if waited:
+        metrics.SPAN_SECONDS.observe(waited, span='rate_limit')
+
+
+def scrape_usn(services, driver, usn, owner, run_id, timings=None):
+    """Fetch one result page with ``driver`` into ``owner``'s archive; returns the waits.Outcome.
+
+    Every step waits on a page event rather than a fixed sleep, and the time
+    spent in each phase is recorded in ``timings``. The page is archived
+    only when the outcome is a result.
+    """
+    config, logger = services.config, services.logger
+    timeouts = dict(waits.DEFAULT_TIMEOUTS, **config['WAIT_TIMEOUTS'])
+    timings = waits.PhaseTimings() if timings is None else timings
+
+    with timings.phase('page_load'):
+        _throttle(services)
+        driver.get(config['RESULTS_URL'])
+        waits.wait(driver, timeouts['page_load']).until(
+            EC.visibility_of_element_located(waits.USN_LOCATOR)
+        ).send_keys(usn)
+    current_url_before_submit = driver.current_url
+
+    with timings.phase('captcha'):
+        if config['CAPTCHA_MODE'] == 'queue':
+            answer = _captcha_from_operator(services, driver, usn, owner, run_id, timeouts['captcha'])
+            if answer:
+                driver.find_element(*waits.CAPTCHA_LOCATOR).send_keys(answer)
+            state = 'filled' if answer else None
+        else:
+            logger.info("ACTION REQUIRED: Enter captcha for USN: %s in the browser within %s seconds.", usn, timeouts['captcha'])
+            try:
+                state = waits.wait(driver, timeouts['captcha']).until(
+                    waits.captcha_filled(current_url_before_submit,
+                                         min_length=config['CAPTCHA_LENGTH']))
+            except TimeoutException:
+                state = None
+        if state is None:
+            logger.warning("No captcha for %s (skipped, or none within %s seconds).", usn, timeouts['captcha'])
+            metrics.SCRAPE_OUTCOMES.inc(outcome=waits.CAPTCHA_TIMEOUT)
+            return waits.Outcome(waits.CAPTCHA_TIMEOUT)
+
+    with timings.phase('submit'):
+        if state == 'filled':
+            _throttle(services)
+            driver.find_element(*waits.SUBMIT_LOCATOR).click()
+        outcome = waits.wait_for_result(driver, current_url_before_submit, timeouts['result'])
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Timings for %s: %s", usn, timings.summary())
+    metrics.SCRAPE_OUTCOMES.inc(outcome=outcome.kind)
+    if not outcome.ok:
+        logger.info("No results, invalid USN, or CAPTCHA issue for %s (%s).", usn, outcome.kind)
+        return outcome
+
+    digest = services.get_page_archive(owner).put(usn, driver.page_source, services.exam_session(),
+                                                  run_id=run_id)
+    logger.debug("Archived HTML for USN: %s as %s", usn, digest[:12])
+    return outcome
+
+
+def _captcha_from_operator(services, driver, usn, owner, run_id, timeout):
+    """Post the captcha image to the hand-off queue and wait for the operator's answer."""
+    captcha_queue = services.captcha_queue
+    image = driver.find_element(*waits.CAPTCHA_IMAGE_LOCATOR).screenshot_as_png
+    pending = captcha_queue.submit(owner, run_id, usn, image)
+    services.logger.info("Captcha for USN %s is waiting on /captcha (%s).", usn, pending.id)
+    try:
+        answer = pending.wait(timeout)
+    finally:
+        captcha_queue.withdraw(pending)
+    return answer.strip() if answer else None
+
+
+# Outcomes worth another attempt; the rest (invalid USN, results not out,
+# no operator answer) would only fail the same way again.
+RETRYABLE_OUTCOMES = (waits.TIMEOUT, waits.BAD_CAPTCHA)
+
+OUTCOME_MESSAGES = {
+    waits.INVALID_USN: 'Invalid USN.',
+    waits.NOT_AVAILABLE: 'Results are not yet available.',
+    waits.BAD_CAPTCHA: 'Captcha was rejected.',
+    waits.TIMEOUT: 'Timed out waiting for the result page.',
+    waits.CAPTCHA_TIMEOUT: 'No captcha answer was given in time.',
+}
+
+
+def scrape_task(services, owner, run_id, usn):
+    config, logger = services.config, services.logger
+    attempts = max(1, config['SCRAPE_ATTEMPTS'])
+    message = None
+    for attempt in range(attempts):
+        if attempt:
+            if services.get_job_manager().cancel_requested(run_id):
+                break
+            # A rejected captcha just needs a fresh one; anything else backs off.
+            if reason != waits.BAD_CAPTCHA:
+                time.sleep(backoff_delay(attempt - 1, config['RETRY_BACKOFF_BASE'],
+                                         config['RETRY_BACKOFF_CAP'], random))
+            metrics.SCRAPE_RETRIES.inc(reason=reason)
+        timings = waits.PhaseTimings()
+        try:
+            with services.get_driver_pool().driver() as driver:
+                outcome = scrape_usn(services, driver, usn, owner, run_id, timings)
+        except WebDriverException as e:
+            # Covers page-load timeouts and lost browser sessions; the pool
+            # has already recycled the driver.
+            metrics.SCRAPE_OUTCOMES.inc(outcome='error')
+            logger.warning("Attempt %d/%d for USN %s failed: %s", attempt + 1, attempts, usn, e.msg or e)
+            reason, message = 'error', f'Browser error: {e.msg or e}'
+            continue
+        except Exception:
+            metrics.SCRAPE_OUTCOMES.inc(outcome='error')
+            logger.exception("ERROR processing USN %s", usn)
+            raise
+        finally:
+            for phase, seconds in timings.items():
+                metrics.SPAN_SECONDS.observe(seconds, span=phase)
+        if outcome.ok:
+            return True, None
+        reason = outcome.kind
+        message = OUTCOME_MESSAGES.get(outcome.kind, 'No results, invalid USN, or CAPTCHA issue.')
+        if outcome.kind not in RETRYABLE_OUTCOMES:
+            break
+    return False, message
@@ -0,0 +1,111 @@
+"""Parse stage of a scrape job: archived pages -> the user's results store."""
+import logging
+import os
+
+import metrics
+from page_archive import parse_blob_file
+import result_parser
+
+
+def parse_blobs(services, paths):
+    """Yield ``(path, marks, error)`` for archived blob files, bypassing the parse cache."""
+    # Starting a spawn pool costs about as much as parsing a few hundred pages
+    # serially, so it only pays off on a large batch and more than one CPU.
+    workers = services.config['PARSE_WORKERS'] or os.cpu_count() or 1
+    if workers > 1 and len(paths) >= services.config['PARALLEL_PARSE_MIN_FILES']:
+        yield from result_parser.parse_pages(paths, workers=workers, parse=parse_blob_file)
+        return
+    for path in paths:
+        try:
+            yield path, parse_blob_file(path), None
+        except Exception as e:
+            yield path, None, e
+
+
+def parse_archived(services, username, fetches, check_cancelled=None):
+    """Parse archived pages into ``{usn: {subject: mark}}``.
+
+    ``fetches`` are rows from the user's PageArchive. A page is parsed once
+    per parser version however many times it was fetched, since cache
+    entries are keyed on the blob digest.
+    """
+    with metrics.span('parse'):
+        return _parse_archived(services, username, fetches, check_cancelled)
+
+
+def _parse_archived(services, username, fetches, check_cancelled):
+    logger = services.logger
+    archive = services.get_page_archive(username)
+    parse_cache = services.get_parse_cache(username)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    data = {}
+    cache_hits = 0
+    to_parse = {}
+
+    for fetch in fetches:
+        cached_marks = parse_cache.get_blob(fetch['digest'])
+        if cached_marks is None:
+            try:
+                path = archive.path_for(fetch['digest'])
+            except KeyError:
+                logger.error("Archived page %s for USN %s is missing", fetch['digest'][:12], fetch['usn'])
+                metrics.PAGES_PARSED.inc(result='missing')
+                continue
+            to_parse.setdefault(path, []).append(fetch)
+            continue
+        if cached_marks:
+            data[fetch['usn']] = cached_marks
+        cache_hits += 1
+    metrics.PAGES_PARSED.inc(cache_hits, result='cached')
+
+    for path, marks, error in parse_blobs(services, list(to_parse)):
+        if check_cancelled:
+            check_cancelled()
+        page_fetches = to_parse[path]
+        if error is not None:
+            logger.error("Error parsing archived page %s: %s", os.path.basename(path), error)
+            metrics.PAGES_PARSED.inc(len(page_fetches), result='failed')
+            continue
+        metrics.PAGES_PARSED.inc(len(page_fetches), result='parsed' if marks else 'empty')
+        for fetch in page_fetches:
+            if marks:
+                data[fetch['usn']] = marks
+            if debug:
+                if marks:
+                    logger.debug("Parsed %d subjects for USN: %s", len(marks), fetch['usn'])
+                else:
+                    logger.debug("No subject/mark data extracted for USN: %s", fetch['usn'])
+        parse_cache.put_blob(page_fetches[0]['digest'], marks)
+
+    logger.info("Parse cache: %d of %d page(s) reused without parsing.", cache_hits, len(fetches))
+    return data
+
+
+def build_results_table(services, run_id, ctx):
+    """Final job stage: parse the pages archived by this run into the user's results store."""
+    logger = services.logger
+    if not ctx.job.succeeded:
+        raise RuntimeError('No result pages were successfully downloaded. Please check USNs and CAPTCHA entries.')
+
+    logger.info("Job %s: parsing archived pages.", ctx.job.id)
+    fetches = services.get_page_archive(ctx.job.owner).latest(run_id=run_id)
+
+    if not fetches:
+        raise RuntimeError('Critical Error: No archived pages found for this run after scraping.')
+
+    data = parse_archived(services, ctx.job.owner, fetches, ctx.check_cancelled)
+
+    if not data:
+        raise RuntimeError('Could not parse data from any downloaded files. Check console for parsing details and verify saved HTMLs.')
+
+    try:
+        # Merge this run's USNs into what the user has already collected.
+        with metrics.span('store_write'):
+            version = services.get_results_store(ctx.job.owner).write_results(data)
+        subjects = set().union(*data.values())
+        logger.info("Stored results for %d USN(s), %d subject(s) (version %s)", len(data), len(subjects), version)
+    except Exception:
+        logger.exception("ERROR saving results")
+        raise RuntimeError('Error saving results. Check console.')
+
+    return 'Successfully processed USNs and generated results table.'
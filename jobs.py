@@ -0,0 +1,363 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+
+import metrics
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINALIZING = 'finalizing'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+INTERRUPTED = 'interrupted'
+
+ACTIVE_STATES = (QUEUED, RUNNING, FINALIZING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    worker TEXT NOT NULL,
+    heartbeat_at REAL NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created_at);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+_ACTIVE_SQL = ', '.join(f"'{status}'" for status in ACTIVE_STATES)
+
+
+class JobLimitExceeded(RuntimeError):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, owner, items, job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.items = list(items)
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.succeeded = []
+        self.failed = {}
+        self.result = None
+        self.error = None
+        self.cancel_requested = False
+
+    @property
+    def done_count(self):
+        return len(self.succeeded) + len(self.failed)
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATES
+
+    def progress(self):
+        total = len(self.items)
+        return {
+            'id': self.id,
+            'status': self.status,
+            'done': self.done_count,
+            'total': total,
+            'percent': round(100.0 * self.done_count / total, 1) if total else 100.0,
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'result': self.result,
+            'error': self.error,
+        }
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'owner': self.owner,
+            'items': self.items,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'result': self.result,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data['owner'], data['items'], job_id=data['id'])
+        for key in ('status', 'created_at', 'started_at', 'finished_at', 'succeeded',
+                    'failed', 'result', 'error', 'cancel_requested'):
+            setattr(job, key, data.get(key, getattr(job, key)))
+        return job
+
+
+class JobContext:
+    """Handle given to a job's final stage."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def check_cancelled(self):
+        if self.job.cancel_requested:
+            raise JobCancelled(self.job.id)
+
+
+class JobManager:
+    """Runs per-item tasks for a job on a shared worker pool.
+
+    Each submitted job gets a coordinator thread that fans ``task(item)`` out
+    to the worker pool and, once every item has finished, runs
+    ``finalize(ctx)`` as the job's last stage.
+
+    Job state lives in ``state_dir/jobs.sqlite3``, written after every
+    change, so every worker process sees every job and the per-user limit
+    holds across processes. The process running a job stamps a heartbeat
+    on it every ``heartbeat_interval`` seconds; an active job whose
+    heartbeat is older than ``stale_after`` lost its process and is
+    marked interrupted. A cancel from another process is read from the
+    table before each item starts and before the final stage; the
+    heartbeat carries it into a stage that is already running.
+    """
+
+    def __init__(self, state_dir, workers=2, max_jobs=2, per_user_limit=1,
+                 heartbeat_interval=5.0, stale_after=30.0):
+        self.state_dir = state_dir
+        self.db_path = os.path.join(state_dir, 'jobs.sqlite3')
+        self.per_user_limit = per_user_limit
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.worker = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        os.makedirs(state_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Jobs this manager is running; everything else is read from the database.
+        self._jobs = {}
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scrape')
+        self._coordinators = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='job')
+        self._stopped = threading.Event()
+        self._heartbeat = None
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    def _write(self, conn, job, insert=False):
+        # cancel_requested is only ever set by cancel(), so saves never clear it.
+        data = json.dumps(job.to_dict())
+        now = time.time()
+        if insert:
+            conn.execute('INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         (job.id, job.owner, job.status, job.created_at, self.worker, now,
+                          int(job.cancel_requested), data))
+        else:
+            conn.execute('UPDATE jobs SET status = ?, heartbeat_at = ?, data = ? WHERE id = ?',
+                         (job.status, now, data, job.id))
+
+    def _save(self, job):
+        with self._connect() as conn:
+            self._write(conn, job)
+
+    def _update(self, job, change):
+        with self._lock:
+            change(job)
+            self._save(job)
+
+    @staticmethod
+    def _from_row(data, cancel_requested):
+        job = Job.from_dict(json.loads(data))
+        job.cancel_requested = bool(cancel_requested)
+        return job
+
+    def _reap(self, conn):
+        """Mark active jobs whose process stopped heartbeating as interrupted."""
+        rows = conn.execute(f'SELECT data, cancel_requested FROM jobs WHERE status IN ({_ACTIVE_SQL}) '
+                            'AND heartbeat_at < ?', (time.time() - self.stale_after,)).fetchall()
+        for data, cancel_requested in rows:
+            job = self._from_row(data, cancel_requested)
+            job.status = INTERRUPTED
+            job.finished_at = job.finished_at or time.time()
+            conn.execute(f'UPDATE jobs SET status = ?, data = ? WHERE id = ? AND status IN ({_ACTIVE_SQL})',
+                         (job.status, json.dumps(job.to_dict()), job.id))
+
+    def _query(self, where, params=()):
+        with self._connect() as conn:
+            self._reap(conn)
+            rows = conn.execute(f'SELECT id, data, cancel_requested FROM jobs {where}', params).fetchall()
+        with self._lock:
+            return [self._jobs.get(job_id) or self._from_row(data, cancel_requested)
+                    for job_id, data, cancel_requested in rows]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        jobs = self._query('WHERE id = ?', (job_id,))
+        return jobs[0] if jobs else None
+
+    def jobs_for(self, owner):
+        return self._query('WHERE owner = ? ORDER BY created_at DESC', (owner,))
+
+    def active_jobs(self):
+        """Active jobs across every process sharing ``state_dir``."""
+        return self._query(f'WHERE status IN ({_ACTIVE_SQL})')
+
+    def submit(self, owner, items, task, finalize=None, job_id=None):
+        job = Job(owner, items, job_id=job_id)
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._reap(conn)
+                active = conn.execute(f'SELECT COUNT(*) FROM jobs WHERE owner = ? AND status IN ({_ACTIVE_SQL})',
+                                      (owner,)).fetchone()[0]
+                if self.per_user_limit and active >= self.per_user_limit:
+                    raise JobLimitExceeded(
+                        f'{owner} already has {active} running job(s); the limit is {self.per_user_limit}.')
+                self._write(conn, job, insert=True)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        with self._lock:
+            self._jobs[job.id] = job
+            self._start_heartbeat()
+        self._coordinators.submit(self._run, job, task, finalize)
+        return job
+
+    def cancel(self, job_id):
+        with self._connect() as conn:
+            cursor = conn.execute(f'UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ({_ACTIVE_SQL})',
+                                  (job_id,))
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and cursor.rowcount:
+                job.cancel_requested = True
+        return bool(cursor.rowcount)
+
+    def cancel_requested(self, job_id):
+        """Whether any process asked to cancel ``job_id``, read from the table."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if not (row and row[0]):
+            return False
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.cancel_requested = True
+        return True
+
+    def _cancelled(self, job):
+        return job.cancel_requested or self.cancel_requested(job.id)
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._beat, name='job-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            try:
+                with self._connect() as conn:
+                    conn.execute(f'UPDATE jobs SET heartbeat_at = ? WHERE worker = ? AND status IN ({_ACTIVE_SQL})',
+                                 (time.time(), self.worker))
+                    cancelled = {row[0] for row in conn.execute(
+                        f'SELECT id FROM jobs WHERE worker = ? AND cancel_requested = 1 AND status IN ({_ACTIVE_SQL})',
+                        (self.worker,))}
+            except sqlite3.Error:
+                continue
+            with self._lock:
+                for job_id in cancelled:
+                    if job_id in self._jobs:
+                        self._jobs[job_id].cancel_requested = True
+
+    def _run(self, job, task, finalize):
+        if self._cancelled(job):
+            self._finish(job, CANCELLED)
+            return
+
+        def start(job):
+            job.status = RUNNING
+            job.started_at = time.time()
+        self._update(job, start)
+
+        futures = {self._workers.submit(self._run_item, job, task, item): item
+                   for item in job.items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                ok, message = future.result()
+            except JobCancelled:
+                ok, message = False, 'cancelled'
+            except Exception as e:
+                ok, message = False, f'{type(e).__name__}: {e}'
+
+            def record(job):
+                if ok:
+                    job.succeeded.append(item)
+                else:
+                    job.failed[item] = message or 'no result'
+            self._update(job, record)
+
+        if self._cancelled(job):
+            self._finish(job, CANCELLED)
+            return
+        if finalize is None:
+            self._finish(job, DONE)
+            return
+
+        self._update(job, lambda job: setattr(job, 'status', FINALIZING))
+        try:
+            result = finalize(JobContext(job))
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            self._finish(job, FAILED, error=str(e))
+        else:
+            self._finish(job, DONE, result=result)
+
+    def _run_item(self, job, task, item):
+        if self._cancelled(job):
+            raise JobCancelled(job.id)
+        result = task(item)
+        if isinstance(result, tuple):
+            return result
+        return bool(result), None
+
+    def _finish(self, job, status, result=None, error=None):
+        def finish(job):
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+        self._update(job, finish)
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        metrics.JOBS_FINISHED.inc(status=status)
+
+    def shutdown(self, wait=False):
+        self._stopped.set()
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active:
+                    job.cancel_requested = True
+        self._workers.shutdown(wait=wait, cancel_futures=True)
+        self._coordinators.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,167 @@
+"""In-process counters and timing histograms, rendered in Prometheus text format.
+
+Each process keeps its own registry, so with several server workers every
+worker's /metrics has to be scraped (or the values summed) separately.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def header(self):
+        return [f'# HELP {self.name}_total {self.help}', f'# TYPE {self.name}_total {self.kind}']
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}_total{_labels(self.labelnames, key)} {_number(value)}'
+                                for key, value in items]
+
+
+class Gauge(_Metric):
+    """A value read from ``callback`` at scrape time."""
+    kind = 'gauge'
+
+    def __init__(self, name, help, callback):
+        super().__init__(name, help)
+        self.callback = callback
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception:
+            logger.exception('Gauge %s failed', self.name)
+            return []
+        return self.header() + [f'{self.name} {_number(value)}']
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._values.items())
+        lines = self.header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {n}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric, replace=False):
+        with self._lock:
+            if metric.name in self._metrics and not replace:
+                raise ValueError(f'metric {metric.name} already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+SPAN_SECONDS = REGISTRY.register(Histogram(
+    'vtu_span_seconds', 'Time spent in each instrumented step of the scrape/parse/export pipeline.',
+    ['span']))
+SCRAPE_OUTCOMES = REGISTRY.register(Counter(
+    'vtu_scrape_outcomes', 'Scrape attempts by outcome (result, invalid_usn, bad_captcha, ...).',
+    ['outcome']))
+PAGES_PARSED = REGISTRY.register(Counter(
+    'vtu_pages_parsed', 'Result pages handled by the parse stage, by result.', ['result']))
+SCRAPE_RETRIES = REGISTRY.register(Counter(
+    'vtu_scrape_retries', 'USN fetches retried after a transient failure, by reason.', ['reason']))
+JOBS_FINISHED = REGISTRY.register(Counter(
+    'vtu_jobs_finished', 'Scrape jobs that reached a final state, by status.', ['status']))
+
+
+@contextmanager
+def span(name):
+    """Time a pipeline step into ``vtu_span_seconds{span=name}``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        SPAN_SECONDS.observe(seconds, span=name)
+        logger.debug('span %s took %.4fs', name, seconds)
@@ -0,0 +1,205 @@
+"""Content-addressed archive of fetched result pages.
+
+Layout::
+
+    <root>/index.sqlite3                fetch index and blob table
+    <root>/blobs/ab/abcdef....html.gz   one compressed blob per distinct page
+
+Blobs are named by the SHA-256 of the raw page, so fetching an unchanged
+page again only adds an index row. Blobs are zstd-compressed when the
+optional ``zstandard`` package is installed and gzip-compressed otherwise;
+either kind can be read back as long as its codec is available.
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import result_parser
+from workspace import atomic_write
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    usn TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    session TEXT NOT NULL,
+    run_id TEXT,
+    digest TEXT NOT NULL REFERENCES blobs (digest)
+);
+CREATE INDEX IF NOT EXISTS fetches_usn ON fetches (usn, session, fetched_at);
+CREATE INDEX IF NOT EXISTS fetches_run ON fetches (run_id);
+"""
+
+_FETCH_COLUMNS = ('id', 'usn', 'fetched_at', 'session', 'run_id', 'digest')
+
+CODEC_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def default_codec():
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def open_blob_file(path):
+    """Open a blob file as a stream of the original page bytes."""
+    if path.endswith(CODEC_SUFFIXES['zstd']):
+        if zstandard is None:
+            raise RuntimeError(f'{path} is zstd-compressed; install zstandard to read it.')
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return gzip.open(path, 'rb')
+
+
+def read_blob_file(path):
+    with open_blob_file(path) as fp:
+        return fp.read()
+
+
+def parse_blob_file(path):
+    # Module-level so parse_pages can send it to spawned worker processes.
+    return result_parser.parse_result_page(read_blob_file(path))
+
+
+class PageArchive:
+    def __init__(self, root, codec=None):
+        self.root = root
+        self.blobs_dir = os.path.join(root, 'blobs')
+        self.db_path = os.path.join(root, 'index.sqlite3')
+        self.codec = codec or default_codec()
+        self._lock = threading.Lock()
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    def blob_path(self, digest, codec=None):
+        suffix = CODEC_SUFFIXES[codec or self.codec]
+        return os.path.join(self.blobs_dir, digest[:2], f'{digest}.html{suffix}')
+
+    def put(self, usn, content, session, run_id=None, fetched_at=None):
+        """Archive one fetched page; returns its digest.
+
+        The blob is written only if no identical page is archived yet, or
+        if its file has gone missing.
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock, self._connect() as conn:
+            # One transaction, so a concurrent prune cannot drop the blob in between.
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                known = conn.execute('SELECT codec FROM blobs WHERE digest = ?', (digest,)).fetchone()
+                if known is None or not os.path.exists(self.blob_path(digest, known[0])):
+                    stored = compress(data, self.codec)
+                    atomic_write(self.blob_path(digest), stored)
+                    conn.execute('INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)',
+                                 (digest, self.codec, len(data), len(stored), fetched_at))
+                conn.execute('INSERT INTO fetches (usn, fetched_at, session, run_id, digest) VALUES (?, ?, ?, ?, ?)',
+                             (usn, fetched_at, session, run_id, digest))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return digest
+
+    def prune(self, cutoff):
+        """Forget fetches made before ``cutoff`` and delete blobs left unreferenced.
+
+        The newest fetch of each USN in each exam session is kept however
+        old it is, so ``reparse-archive`` can always rebuild the results.
+        Returns the number of blob files removed.
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('''
+                    DELETE FROM fetches WHERE fetched_at < ? AND id NOT IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY usn, session ORDER BY fetched_at DESC, id DESC) AS newest
+                            FROM fetches)
+                        WHERE newest = 1)''', (cutoff,))
+                orphans = conn.execute('SELECT digest, codec FROM blobs WHERE digest NOT IN '
+                                       '(SELECT digest FROM fetches)').fetchall()
+                conn.executemany('DELETE FROM blobs WHERE digest = ?', [(digest,) for digest, _ in orphans])
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            # Files go only once their rows are gone for good, and under the
+            # write lock so a put() of the same page cannot slip in between.
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for digest, codec in orphans:
+                    if conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone():
+                        continue
+                    try:
+                        os.remove(self.blob_path(digest, codec))
+                    except FileNotFoundError:
+                        pass
+            finally:
+                conn.execute('COMMIT')
+        return len(orphans)
+
+    def _fetches(self, where, params):
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(_FETCH_COLUMNS)} FROM fetches {where}", params).fetchall()
+        return [dict(zip(_FETCH_COLUMNS, row)) for row in rows]
+
+    def latest(self, session=None, run_id=None):
+        """The newest fetch per USN, optionally within one session or run."""
+        clauses, params = [], []
+        if session is not None:
+            clauses.append('session = ?')
+            params.append(session)
+        if run_id is not None:
+            clauses.append('run_id = ?')
+            params.append(run_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        newest = {}
+        for fetch in self._fetches(f'{where} ORDER BY fetched_at, id', params):
+            newest[fetch['usn']] = fetch
+        return list(newest.values())
+
+    def digests(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute('SELECT digest FROM blobs')]
+
+    def path_for(self, digest):
+        with self._connect() as conn:
+            row = conn.execute('SELECT codec FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return self.blob_path(digest, row[0])
+
+    def stats(self):
+        with self._connect() as conn:
+            fetches = conn.execute('SELECT COUNT(*) FROM fetches').fetchone()[0]
+            blobs, size, stored = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs').fetchone()
+        return {'fetches': fetches, 'blobs': blobs, 'raw_bytes': size, 'stored_bytes': stored}
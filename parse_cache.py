@@ -0,0 +1,66 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parsed_blobs (
+    digest TEXT PRIMARY KEY,
+    parser_version INTEGER NOT NULL,
+    marks TEXT NOT NULL
+);
+"""
+
+
+class ParseCache:
+    """Persistent ``{subject: mark}`` cache for archived result pages.
+
+    Archived pages never change, so entries are keyed on the blob digest
+    alone and are only trusted while ``parser_version`` matches the version
+    that produced them. Rows written by another parser version are dropped
+    when the cache is opened.
+    """
+
+    def __init__(self, db_path, parser_version):
+        self.db_path = db_path
+        self.parser_version = parser_version
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute('DELETE FROM parsed_blobs WHERE parser_version != ?', (parser_version,))
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    def get_blob(self, digest):
+        with self._connect() as conn:
+            row = conn.execute('SELECT marks FROM parsed_blobs WHERE digest = ? AND parser_version = ?',
+                               (digest, self.parser_version)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put_blob(self, digest, marks):
+        with self._lock, self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO parsed_blobs VALUES (?, ?, ?)',
+                         (digest, self.parser_version, json.dumps(marks)))
+
+    def forget_missing(self, digests):
+        """Drop entries for blobs not in ``digests`` (e.g. pruned from the archive); returns how many."""
+        digests = set(digests)
+        with self._lock, self._connect() as conn:
+            gone = [(digest,) for (digest,) in conn.execute('SELECT digest FROM parsed_blobs')
+                    if digest not in digests]
+            conn.executemany('DELETE FROM parsed_blobs WHERE digest = ?', gone)
+        return len(gone)
+
+    def purge(self):
+        with self._lock, self._connect() as conn:
+            count = len(self)
+            conn.execute('DELETE FROM parsed_blobs')
+        return count
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM parsed_blobs').fetchone()[0]
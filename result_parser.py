@@ -0,0 +1,150 @@
+"""Extraction of ``{subject code: external mark}`` from saved VTU result pages."""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from lxml import etree, html
+
+
+# Bump whenever parsing changes what it extracts; cached parses from other
+# versions are discarded.
+PARSER_VERSION = 1
+
+TABLE_HEADERS = frozenset(["subject code", "subject name", "subject", "sl. no."])
+TABLE_MARKS = frozenset(['AB', 'NE', 'ABSENT', 'FAIL', 'PASS'])
+TEXT_MARKS = frozenset(['AB', 'NE'])
+
+# Compiled once; evaluating an XPath string re-parses it on every call.
+_result_tables = etree.XPath('//table[contains(@class,"table")] | //table[@id="resultsTable"]') # Common table classes/IDs
+_table_rows = etree.XPath('.//tr')
+_row_tds = etree.XPath('.//td')
+_div_rows = etree.XPath('//div[contains(@class, "divTableRow")]')
+_div_cells = etree.XPath('.//div[contains(@class,"divTableCell")]')
+_text_nodes = etree.XPath('.//text()', smart_strings=False)
+
+
+def _texts(element):
+    # Every non-blank text node under ``element``, stripped once.
+    return [text for text in (t.strip() for t in _text_nodes(element)) if text]
+
+
+def _mark(texts):
+    # Filter for digits or common non-numeric marks
+    return "".join([t for t in texts if t.isdigit() or t in TEXT_MARKS])
+
+
+def _parse_table(tree):
+    marks = {}
+    result_table_element = _result_tables(tree)
+    if not result_table_element:
+        return marks
+
+    for row_node in _table_rows(result_table_element[0]):
+        td_elements = _row_tds(row_node)
+        if len(td_elements) <= 4:
+            continue
+        subject_code = " ".join(_texts(td_elements[1]))
+        # External marks usually in the 5th column
+        external_mark = _mark(_texts(td_elements[4]))
+        # Subject code shouldn't be empty or look like a header, marks should be plausible
+        if subject_code and (external_mark.isdigit() or external_mark in TABLE_MARKS) \
+                and subject_code.lower() not in TABLE_HEADERS:
+            marks[subject_code] = external_mark
+    return marks
+
+
+def _is_div_header(cells):
+    text = "".join(t for cell in cells for t in _text_nodes(cell)).lower()
+    return "subject code" in text or "internal marks" in text
+
+
+def _parse_div_rows(tree):
+    marks = {}
+    for row_node in _div_rows(tree):
+        cells = _div_cells(row_node)
+        if len(cells) < 5:
+            continue
+        subject_code = " ".join(_texts(cells[0]))
+        external_mark = _mark(_texts(cells[4]))
+        # Header rows never carry a mark, so only rows that would be kept need the header check.
+        if subject_code and (external_mark.isdigit() or external_mark in TEXT_MARKS) \
+                and not _is_div_header(cells):
+            marks[subject_code] = external_mark
+    return marks
+
+
+def parse_result_page(html_bytes):
+    """Return ``{subject code: external mark}`` for one result page.
+
+    Pages using a ``<table>`` layout are tried first, then the
+    ``divTableRow`` layout. An empty dict means nothing could be extracted.
+    """
+    if isinstance(html_bytes, bytes):
+        html_bytes = html_bytes.decode('utf-8', errors='replace')
+    if not html_bytes.strip():
+        return {}
+
+    tree = html.fromstring(html_bytes)
+    return _parse_table(tree) or _parse_div_rows(tree)
+
+
+def parse_result_file(path):
+    with open(path, 'rb') as fp:
+        return parse_result_page(fp.read())
+
+
+def parse_pages(paths, workers=None, max_pending=None, parse=parse_result_file):
+    """Parse result files on a process pool, yielding as each one finishes.
+
+    Yields ``(path, marks, error)`` tuples in completion order; ``error`` is
+    the exception raised for that file, if any. Workers read the files
+    themselves and only ``max_pending`` files are in flight at once, so
+    memory stays bounded however many paths are passed. ``parse`` must be a
+    module-level function so it can be sent to the workers.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = {}
+        for path in paths:
+            pending[pool.submit(parse, path)] = path
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from _collect(done, pending)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from _collect(done, pending)
+
+
+def _collect(done, pending):
+    for future in done:
+        path = pending.pop(future)
+        error = future.exception()
+        yield path, (None if error else future.result()), error
+
+
+def main(argv):
+    if not argv:
+        print('usage: python result_parser.py PAGE_DIR [WORKERS]')
+        return 2
+    page_dir = argv[0]
+    workers = int(argv[1]) if len(argv) > 1 else None
+    paths = [os.path.join(page_dir, name) for name in os.listdir(page_dir) if name.endswith('.html')]
+    start = time.perf_counter()
+    parsed = failed = 0
+    for _, marks, error in parse_pages(paths, workers=workers):
+        if error is None and marks:
+            parsed += 1
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    rate = len(paths) / elapsed if elapsed else 0.0
+    print(f"{len(paths)} page(s): {parsed} parsed, {failed} empty or failed in {elapsed:.2f}s ({rate:.1f} pages/sec)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
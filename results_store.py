@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+
+# How a mark cell is stored: numeric marks keep ``code`` 0 and an integer
+# ``mark``; everything else is a code with a NULL mark. Subjects a student
+# did not take have no row at all and read back as MISSING.
+NUMERIC = 0
+STATUS_CODES = {'AB': 1, 'NE': 2, 'ABSENT': 3, 'FAIL': 4, 'PASS': 5}
+STATUS_LABELS = {code: label for label, code in STATUS_CODES.items()}
+MISSING = '-'
+
+MARK_DTYPE = 'Int16'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS marks (
+    usn TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    mark INTEGER,
+    code INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (usn, subject)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS marks_subject ON marks (subject);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+"""
+
+
+def encode_mark(mark):
+    mark = str(mark).strip()
+    if mark.isdigit():
+        return int(mark), NUMERIC
+    return None, STATUS_CODES.get(mark.upper(), STATUS_CODES['NE'])
+
+
+def decode_mark(mark, code):
+    if code == NUMERIC and mark is not None:
+        return str(mark)
+    return STATUS_LABELS.get(code, MISSING)
+
+
+class ResultsStore:
+    """Canonical, typed on-disk store for parsed results.
+
+    Marks are kept in long form (one row per USN and subject) in SQLite.
+    Every write bumps :attr:`version`, which readers use as a cache key.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    @property
+    def version(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def write_results(self, data, replace=False):
+        """Store ``{usn: {subject: mark}}``; returns the new version.
+
+        Rows for each USN in ``data`` are replaced. With ``replace`` the
+        whole store is rebuilt from ``data``.
+        """
+        # USNs are case-insensitive; store them the way VTU prints them.
+        data = {usn.strip().upper(): marks for usn, marks in data.items()}
+        rows = [(usn, subject) + encode_mark(mark)
+                for usn, marks in data.items() for subject, mark in marks.items()]
+        with self._lock, self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if replace:
+                    conn.execute('DELETE FROM marks')
+                else:
+                    conn.executemany('DELETE FROM marks WHERE usn = ?', [(usn,) for usn in data])
+                conn.executemany('INSERT INTO marks VALUES (?, ?, ?, ?)', rows)
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return version
+
+    def subjects(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute('SELECT DISTINCT subject FROM marks ORDER BY subject')]
+
+    def usn_count(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(DISTINCT usn) FROM marks').fetchone()[0]
+
+    def iter_rows(self, subjects=None, batch_size=1000):
+        """Yield ``[usn, label, ...]`` per USN, in USN order, straight off a cursor.
+
+        Only ``batch_size`` database rows are held at a time, so exports
+        stay flat in memory however large the cohort is.
+        """
+        subjects = list(subjects) if subjects is not None else self.subjects()
+        position = {subject: i for i, subject in enumerate(subjects, 1)}
+        query = 'SELECT usn, subject, mark, code FROM marks'
+        params = ()
+        if subjects:
+            query += f" WHERE subject IN ({', '.join('?' * len(subjects))})"
+            params = tuple(subjects)
+        query += ' ORDER BY usn'
+        with self._connect() as conn:
+            cursor = conn.execute(query, params)
+            current, row = None, None
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for usn, subject, mark, code in batch:
+                    if usn != current:
+                        if row is not None:
+                            yield row
+                        current, row = usn, [usn] + [MISSING] * len(subjects)
+                    index = position.get(subject)
+                    if index is not None:
+                        row[index] = decode_mark(mark, code)
+            if row is not None:
+                yield row
+
+    def _long_frame(self, subjects=None, conn=None):
+        # pandas is only needed by the frame loaders; iter_rows and writes work without it.
+        import pandas as pd
+
+        if conn is None:
+            with self._connect() as conn:
+                return self._long_frame(subjects, conn)
+        query = 'SELECT usn, subject, mark, code FROM marks'
+        params = ()
+        if subjects is not None:
+            query += f" WHERE subject IN ({', '.join('?' * len(subjects))})"
+            params = tuple(subjects)
+        return pd.read_sql_query(query, conn, params=params,
+                                 dtype={'usn': 'string', 'subject': 'string',
+                                        'mark': MARK_DTYPE, 'code': 'int8'})
+
+    @staticmethod
+    def _wide(long_df, values, subjects):
+        wide = long_df.pivot(index='usn', columns='subject', values=values)
+        columns = list(subjects) if subjects is not None else sorted(wide.columns)
+        wide = wide.reindex(columns=columns).sort_index()
+        wide.columns.name = None
+        return wide
+
+    @staticmethod
+    def _with_usn(wide):
+        return wide.rename_axis('USN').reset_index()
+
+    @classmethod
+    def _marks_frame(cls, long_df, subjects):
+        return cls._with_usn(cls._wide(long_df, 'mark', subjects).astype(MARK_DTYPE))
+
+    @classmethod
+    def _codes_frame(cls, long_df, subjects):
+        return cls._with_usn(cls._wide(long_df, 'code', subjects).fillna(-1).astype('int8'))
+
+    def load_marks(self, subjects=None):
+        """Wide frame of numeric marks: ``USN`` plus one Int16 column per subject.
+
+        AB/NE and other status codes, and subjects not taken, are NA.
+        """
+        return self._marks_frame(self._long_frame(subjects), subjects)
+
+    def load_snapshot(self, subjects=None):
+        """``(version, marks, codes)``: marks as :meth:`load_marks` returns them, and
+        status codes (``int8``) in the same layout, -1 where the subject was not taken.
+
+        All three come from one read transaction and one query, so a write
+        that commits meanwhile can neither misalign the two frames' rows
+        nor label them with the wrong version.
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN')
+            try:
+                version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+                long_df = self._long_frame(subjects, conn)
+            finally:
+                conn.execute('COMMIT')
+        return version, self._marks_frame(long_df, subjects), self._codes_frame(long_df, subjects)
+
+    def load_display(self, subjects=None):
+        """Wide frame of marks as shown to users ('45', 'AB', 'NE', '-')."""
+        long_df = self._long_frame(subjects)
+        labels = long_df['mark'].astype('string')
+        for code, label in STATUS_LABELS.items():
+            labels = labels.mask(long_df['code'] == code, label)
+        long_df['label'] = labels
+        wide = self._wide(long_df, 'label', subjects)
+        return self._with_usn(wide.astype(object).fillna(MISSING))
@@ -0,0 +1,163 @@
+import uuid
+from functools import partial
+
+from flask import (Blueprint, render_template, request, redirect, url_for,
+                   session, flash, Response, jsonify, abort)
+
+from auth import is_logged_in
+from jobs import JobLimitExceeded
+from services import get_services
+
+
+bp = Blueprint('scraping', __name__)
+
+
+def wants_json():
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return request.is_json or best == 'application/json'
+
+
+@bp.route('/check')
+def check_page():
+    if not is_logged_in():
+        flash('Please log in to access this page.', 'warning')
+        return redirect(url_for('auth.user_login'))
+    return render_template('check.html', job_id=request.args.get('job'))
+
+
+@bp.route('/run_check_and_combine', methods=['POST'])
+def run_check_and_combine():
+    if not is_logged_in():
+        flash('Please log in to perform this action.', 'warning')
+        return redirect(url_for('auth.user_login'))
+
+    usn_input = request.form.get('student_ids', '')
+    usn_list = list(dict.fromkeys(usn.strip().upper() for usn in usn_input.split(',') if usn.strip()))
+
+    if not usn_list:
+        flash('Please enter at least one valid USN.', 'error')
+        return redirect(url_for('scraping.check_page'))
+
+    # The scrape and parse stages bring selenium and lxml with them; only
+    # workers that actually run jobs import them.
+    from fetcher import scrape_task
+    from ingest import build_results_table
+
+    services = get_services()
+    owner = session['username']
+    # Pages are archived under the job's run id, so concurrent batches
+    # (from one user or many) never read each other's pages.
+    run_id = uuid.uuid4().hex[:12]
+    try:
+        job = services.get_job_manager().submit(owner, usn_list, partial(scrape_task, services, owner, run_id),
+                                                finalize=partial(build_results_table, services, run_id),
+                                                job_id=run_id)
+    except JobLimitExceeded as e:
+        if wants_json():
+            return jsonify({'error': str(e)}), 429
+        flash(str(e), 'warning')
+        return redirect(url_for('scraping.check_page'))
+
+    services.logger.info("Queued job %s for %d USN(s).", job.id, len(usn_list))
+    services.maybe_collect_garbage()
+    if wants_json():
+        return jsonify({'job_id': job.id,
+                        'status_url': url_for('scraping.job_status', job_id=job.id),
+                        'progress_url': url_for('scraping.job_progress', job_id=job.id)}), 202
+    flash(f'Started job {job.id} for {len(usn_list)} USN(s). Progress is shown below.', 'info')
+    return redirect(url_for('scraping.check_page', job=job.id))
+
+
+def _owned_job(job_id):
+    job = get_services().get_job_manager().get(job_id)
+    if job is None or job.owner != session.get('username'):
+        abort(404)
+    return job
+
+
+@bp.route('/jobs')
+def list_jobs():
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    jobs = get_services().get_job_manager().jobs_for(session['username'])
+    return jsonify([job.progress() for job in jobs])
+
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    return jsonify(_owned_job(job_id).to_dict())
+
+
+@bp.route('/jobs/<job_id>/progress')
+def job_progress(job_id):
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    return jsonify(_owned_job(job_id).progress())
+
+
+@bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    services = get_services()
+    job = _owned_job(job_id)
+    cancelled = services.get_job_manager().cancel(job.id)
+    # Release workers blocked on a captcha for this job.
+    for pending in services.captcha_queue.pending(job.owner):
+        if pending.job_id == job.id:
+            services.captcha_queue.skip(pending.id)
+    return jsonify({'id': job.id, 'cancel_requested': cancelled, 'status': job.status})
+
+
+@bp.route('/captcha')
+def captcha_page():
+    if not is_logged_in():
+        flash('Please log in to access this page.', 'warning')
+        return redirect(url_for('auth.user_login'))
+    return render_template('captcha.html', pending=get_services().captcha_queue.pending(session['username']))
+
+
+@bp.route('/captcha/pending')
+def pending_captchas():
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    return jsonify([pending.to_dict() for pending in get_services().captcha_queue.pending(session['username'])])
+
+
+@bp.route('/captcha/<request_id>/image')
+def captcha_image(request_id):
+    if not is_logged_in():
+        abort(401)
+    pending = get_services().captcha_queue.get(request_id, owner=session['username'])
+    if pending is None:
+        abort(404)
+    response = Response(pending.image, mimetype=pending.mimetype)
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@bp.route('/captcha/<request_id>', methods=['POST'])
+def answer_captcha(request_id):
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    captcha_queue = get_services().captcha_queue
+    owner = session['username']
+    if request.form.get('skip'):
+        accepted = captcha_queue.skip(request_id, owner=owner)
+    else:
+        text = request.form.get('answer', '').strip()
+        if not text:
+            if wants_json():
+                return jsonify({'error': 'answer is required'}), 400
+            flash('Type the captcha before submitting.', 'error')
+            return redirect(url_for('scraping.captcha_page'))
+        accepted = captcha_queue.answer(request_id, text, owner=owner)
+    if wants_json():
+        if not accepted:
+            return jsonify({'error': 'This captcha is no longer waiting for an answer.'}), 404
+        return jsonify({'id': request_id, 'accepted': True})
+    if not accepted:
+        flash('That captcha is no longer waiting for an answer.', 'warning')
+    return redirect(url_for('scraping.captcha_page'))
@@ -0,0 +1,173 @@
+"""Per-app resources: stores, pools and caches, each built on first use.
+
+Modules that pull in selenium, lxml, pandas, numpy or plotly are imported
+inside the getters, so a worker that only serves logins and downloads
+never loads them. Background job threads have no app context; they are
+handed the ``Services`` object itself.
+"""
+import atexit
+import os
+import threading
+import time
+
+from flask import current_app
+
+from captcha_queue import CaptchaQueue
+import metrics
+from driver_pool import DriverPool
+from jobs import JobManager
+from lru import LRUCache
+from parse_cache import ParseCache
+from results_store import ResultsStore
+from throttle import HostRateLimiter
+from user_store import UserStore
+from workspace import WorkspaceManager
+
+
+def get_services():
+    return current_app.extensions['vtu']
+
+
+class Services:
+    def __init__(self, app):
+        self.config = app.config
+        self.logger = app.logger
+        self.results_dir = app.config['RESULTS_DIR']
+        self.download_dir = app.config['DOWNLOAD_DIR']
+        self.job_dir = os.path.join(self.results_dir, 'jobs')
+        self.user_db_path = os.path.join(self.results_dir, 'users.sqlite3')
+        os.makedirs(self.results_dir, exist_ok=True)
+        os.makedirs(self.download_dir, exist_ok=True)
+
+        self.workspaces = WorkspaceManager(self.results_dir)
+        # Shared through RESULTS_DIR so any worker can answer a captcha another worker's scrape waits on.
+        self.captcha_queue = CaptchaQueue(os.path.join(self.results_dir, 'captchas'),
+                                          max_age=2 * app.config['WAIT_TIMEOUTS'].get('captcha', 120))
+        self.chart_cache = LRUCache(app.config['CHART_CACHE_SIZE'])
+        self.stats_cache = LRUCache(app.config['STATS_CACHE_SIZE'])
+        self._lock = threading.Lock()
+        self._user_store = None
+        self._driver_pool = None
+        self._rate_limiter = None
+        self._job_manager = None
+        self._last_gc = 0.0
+        # One store, parse cache and view engine per user, each in that user's workspace.
+        self._user_resources = {}
+        self._user_resources_lock = threading.RLock()
+
+    def get_user_store(self):
+        if self._user_store is None:
+            with self._lock:
+                if self._user_store is None:
+                    self._user_store = UserStore(
+                        self.user_db_path,
+                        secret=self.config['SECRET_KEY'],
+                        pool_size=self.config['USER_DB_POOL_SIZE'],
+                        hash_method=self.config['PASSWORD_HASH_METHOD'],
+                        verify_cache_size=self.config['LOGIN_CACHE_SIZE'],
+                        verify_cache_ttl=self.config['LOGIN_CACHE_TTL'],
+                    )
+                    atexit.register(self._user_store.close)
+        return self._user_store
+
+    def get_driver_pool(self):
+        if self._driver_pool is None:
+            with self._lock:
+                if self._driver_pool is None:
+                    self._driver_pool = DriverPool(
+                        self._start_driver,
+                        max_size=self.config['DRIVER_POOL_SIZE'],
+                        max_uses=self.config['DRIVER_MAX_USES'],
+                        acquire_timeout=self.config['DRIVER_ACQUIRE_TIMEOUT'],
+                    )
+                    atexit.register(self._driver_pool.shutdown)
+        return self._driver_pool
+
+    def _start_driver(self):
+        with metrics.span('driver_start'):
+            factory = self.config['DRIVER_FACTORY']
+            if factory is None:
+                from fetcher import make_chrome_driver
+                return make_chrome_driver(self)
+            return factory()
+
+    def get_rate_limiter(self):
+        if self._rate_limiter is None:
+            with self._lock:
+                if self._rate_limiter is None:
+                    # Shared through RESULTS_DIR so the limit holds across worker processes.
+                    self._rate_limiter = HostRateLimiter(self.config['RATE_LIMIT_PER_SECOND'],
+                                                         self.config['RATE_LIMIT_BURST'],
+                                                         db_path=os.path.join(self.results_dir, 'rate_limit.sqlite3'))
+        return self._rate_limiter
+
+    def get_job_manager(self):
+        if self._job_manager is None:
+            with self._lock:
+                if self._job_manager is None:
+                    self._job_manager = JobManager(
+                        self.job_dir,
+                        workers=self.config['JOB_WORKERS'],
+                        max_jobs=self.config['MAX_CONCURRENT_JOBS'],
+                        per_user_limit=self.config['JOBS_PER_USER'],
+                    )
+                    atexit.register(self._job_manager.shutdown)
+        return self._job_manager
+
+    def _user_resource(self, kind, username, build):
+        key = (kind, username)
+        resource = self._user_resources.get(key)
+        if resource is None:
+            with self._user_resources_lock:
+                resource = self._user_resources.get(key)
+                if resource is None:
+                    resource = self._user_resources[key] = build(self.workspaces.user(username))
+        return resource
+
+    def get_parse_cache(self, username):
+        def build(ws):
+            import result_parser
+            return ParseCache(ws.parse_cache_db, result_parser.PARSER_VERSION)
+        return self._user_resource('parse_cache', username, build)
+
+    def get_results_store(self, username):
+        return self._user_resource('results', username, lambda ws: ResultsStore(ws.results_db))
+
+    def get_page_archive(self, username):
+        def build(ws):
+            from page_archive import PageArchive
+            return PageArchive(ws.archive_dir)
+        return self._user_resource('archive', username, build)
+
+    def get_view_engine(self, username):
+        def build(ws):
+            from views import ViewEngine
+            return ViewEngine(self.get_results_store(username), self.config['SEMESTER_VIEWS'])
+        return self._user_resource('views', username, build)
+
+    def exam_session(self):
+        return self.config['EXAM_SESSION'] or self.config['RESULTS_URL'].rstrip('/').split('/')[-2]
+
+    def collect_workspace_garbage(self):
+        return self.workspaces.collect_garbage(self.config['WORKSPACE_RETENTION_DAYS'] * 86400,
+                                               extra_dirs=[self.download_dir])
+
+    def maybe_collect_garbage(self):
+        # Opportunistic cleanup after a submit, at most once an hour per process.
+        # It opens every user's archive, so it runs off the request thread;
+        # ``flask gc-workspaces`` is the explicit way to run it.
+        with self._lock:
+            now = time.time()
+            if now - self._last_gc < 3600:
+                return
+            self._last_gc = now
+        threading.Thread(target=self._collect_garbage_in_background, name='workspace-gc', daemon=True).start()
+
+    def _collect_garbage_in_background(self):
+        try:
+            removed = self.collect_workspace_garbage()
+        except Exception as e:
+            self.logger.warning("Workspace cleanup failed: %s", e)
+            return
+        if removed:
+            self.logger.info("Workspace cleanup removed %d stale page(s)/download(s).", removed)
@@ -0,0 +1,104 @@
+"""Vectorized cohort statistics over a semester view.
+
+Everything here works on the view's marks/codes matrices with NumPy, and
+returns compact, JSON-ready aggregates whose size depends on the number of
+subjects and bins, not on the number of students.
+"""
+import numpy as np
+
+from results_store import STATUS_CODES
+
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _number(value, digits=2):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def subject_summary(view, pass_mark, percentiles=PERCENTILES):
+    marks = view.marks
+    codes = view.codes
+    numeric = ~np.isnan(marks)
+    counts = numeric.sum(axis=0)
+    has_marks = counts > 0
+    safe = np.where(numeric, marks, 0.0)
+
+    width = len(view.subjects)
+    means, medians, mins, maxs = (np.full(width, np.nan) for _ in range(4))
+    pct = np.full((len(percentiles), width), np.nan)
+    if has_marks.any():
+        taken = marks[:, has_marks]
+        means[has_marks] = safe.sum(axis=0)[has_marks] / counts[has_marks]
+        medians[has_marks] = np.nanmedian(taken, axis=0)
+        mins[has_marks] = np.nanmin(taken, axis=0)
+        maxs[has_marks] = np.nanmax(taken, axis=0)
+        pct[:, has_marks] = np.nanpercentile(taken, percentiles, axis=0)
+    passed = (numeric & (safe >= pass_mark)).sum(axis=0)
+    absent = (codes == STATUS_CODES['AB']).sum(axis=0) + (codes == STATUS_CODES['ABSENT']).sum(axis=0)
+    not_eligible = (codes == STATUS_CODES['NE']).sum(axis=0)
+    not_taken = (codes == -1).sum(axis=0)
+
+    summary = []
+    for j, subject in enumerate(view.subjects):
+        entry = {
+            'subject': subject,
+            'count': int(counts[j]),
+            'mean': _number(means[j]),
+            'median': _number(medians[j]),
+            'min': _number(mins[j]),
+            'max': _number(maxs[j]),
+            'percentiles': {str(p): _number(pct[i, j]) for i, p in enumerate(percentiles)},
+            'pass': int(passed[j]),
+            'fail': int(counts[j] - passed[j]),
+            'absent': int(absent[j]),
+            'not_eligible': int(not_eligible[j]),
+            'not_taken': int(not_taken[j]),
+        }
+        summary.append(entry)
+    return summary
+
+
+def histograms(view, bin_width=10, max_mark=100):
+    edges = np.arange(0, max_mark + bin_width, bin_width, dtype=float)
+    # Marks above the last edge still land in the top bin.
+    clipped = np.clip(view.marks, 0, max_mark)
+    counts = {}
+    for subject, column in zip(view.subjects, clipped.T):
+        counts[subject], _ = np.histogram(column[~np.isnan(column)], bins=edges)
+    return {
+        'edges': edges.tolist(),
+        'counts': {subject: values.tolist() for subject, values in counts.items()},
+    }
+
+
+def ranking(view, n=10):
+    """Top and bottom ``n`` students by average numeric mark across the view."""
+    numeric = ~np.isnan(view.marks)
+    counts = numeric.sum(axis=1)
+    totals = np.where(numeric, view.marks, 0.0).sum(axis=1)
+    ranked = np.flatnonzero(counts > 0)
+    averages = totals[ranked] / counts[ranked]
+    order = ranked[np.argsort(-averages, kind='stable')]
+    average_of = dict(zip(ranked.tolist(), averages.tolist()))
+
+    def entries(rows):
+        return [{'USN': str(view.usns[i]), 'average': round(average_of[i], 2),
+                 'total': int(totals[i]), 'subjects': int(counts[i])} for i in rows]
+
+    return {'top': entries(order[:n]), 'bottom': entries(order[::-1][:n])}
+
+
+def cohort_stats(view, pass_mark, bin_width=10, max_mark=100, n=10):
+    return {
+        'view': view.name,
+        'label': view.label,
+        'version': view.version,
+        'students': len(view),
+        'pass_mark': pass_mark,
+        'subjects': subject_summary(view, pass_mark),
+        'histogram': histograms(view, bin_width, max_mark),
+        'ranking': ranking(view, n),
+    }
+
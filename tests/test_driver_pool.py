@@ -0,0 +1,151 @@
+"""DriverPool recycling, health checks, acquire timeouts and shutdown, against a stub driver.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from driver_pool import DriverPool, DriverPoolClosed  # noqa: E402
+
+
+class StubDriver:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.quit_called = False
+        self.cookie_clears = 0
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError('session gone')
+        return 'about:blank'
+
+    def delete_all_cookies(self):
+        self.cookie_clears += 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class StubFactory:
+    def __init__(self):
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            driver = StubDriver(len(self.drivers))
+            self.drivers.append(driver)
+            return driver
+
+
+class DriverPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.factory = StubFactory()
+
+    def pool(self, **kwargs):
+        return DriverPool(self.factory, **kwargs)
+
+    def test_reuses_a_driver_until_max_uses(self):
+        pool = self.pool(max_size=1, max_uses=2)
+        with pool.driver() as first:
+            pass
+        with pool.driver() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertTrue(first.quit_called)
+        self.assertEqual(first.cookie_clears, 1)
+        with pool.driver() as third:
+            pass
+        self.assertIsNot(third, first)
+        self.assertEqual(len(self.factory.drivers), 2)
+
+    def test_replaces_a_driver_that_fails_its_health_check(self):
+        pool = self.pool(max_size=1)
+        with pool.driver() as first:
+            pass
+        first.alive = False
+        with pool.driver() as second:
+            pass
+        self.assertIsNot(second, first)
+        self.assertTrue(first.quit_called)
+        self.assertFalse(second.quit_called)
+
+    def test_recycles_a_driver_whose_block_raised(self):
+        pool = self.pool(max_size=1)
+        with self.assertRaises(ValueError):
+            with pool.driver() as first:
+                raise ValueError('page broke')
+        self.assertTrue(first.quit_called)
+        with pool.driver() as second:
+            self.assertIsNot(second, first)
+
+    def test_checkout_times_out_when_every_driver_is_busy(self):
+        pool = self.pool(max_size=1, acquire_timeout=0.05)
+        with pool.driver():
+            with self.assertRaises(TimeoutError):
+                with pool.driver():
+                    pass
+        with pool.driver() as driver:
+            self.assertIs(driver, self.factory.drivers[0])
+
+    def test_checkout_waits_for_a_driver_to_come_back(self):
+        pool = self.pool(max_size=1, acquire_timeout=5)
+        returned = threading.Event()
+        got = []
+
+        def borrow():
+            with pool.driver() as driver:
+                got.append((driver, returned.is_set()))
+
+        with pool.driver():
+            waiter = threading.Thread(target=borrow)
+            waiter.start()
+            waiter.join(0.05)
+            self.assertTrue(waiter.is_alive())
+            returned.set()
+        waiter.join(5)
+        self.assertEqual(got, [(self.factory.drivers[0], True)])
+
+    def test_shutdown_quits_idle_drivers_and_busy_ones_on_return(self):
+        pool = self.pool(max_size=2)
+        with pool.driver() as busy:
+            with pool.driver() as idle:
+                pass
+            pool.shutdown()
+            self.assertTrue(idle.quit_called)
+            self.assertFalse(busy.quit_called)
+        self.assertTrue(busy.quit_called)
+        with self.assertRaises(DriverPoolClosed):
+            with pool.driver():
+                pass
+
+    def test_shutdown_wakes_waiting_checkouts(self):
+        pool = self.pool(max_size=1)
+        errors = []
+
+        def borrow():
+            try:
+                with pool.driver():
+                    pass
+            except DriverPoolClosed as e:
+                errors.append(e)
+
+        with pool.driver():
+            waiter = threading.Thread(target=borrow)
+            waiter.start()
+            waiter.join(0.05)
+            pool.shutdown()
+            waiter.join(5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
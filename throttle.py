@@ -0,0 +1,112 @@
+"""Per-host request pacing and retry backoff for the scraper.
+
+Every browser session shares one :class:`HostRateLimiter`, so adding
+sessions raises throughput only up to the rate the results site is
+allowed to see. Given a ``db_path`` the buckets live in SQLite, so every
+worker process sharing that file draws from the same budget.
+"""
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from urllib.parse import urlsplit
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+class TokenBucket:
+    """``rate`` requests per second on average, bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, elapsed):
+        """Refill ``tokens`` for ``elapsed`` seconds and take one; returns (tokens, delay)."""
+        tokens = min(self.burst, tokens + max(elapsed, 0.0) * self.rate) - 1
+        return tokens, (0.0 if tokens >= 0 else -tokens / self.rate)
+
+    def reserve(self):
+        """Take a token; returns how long the caller must sleep before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, delay = self._take(self._tokens, now - self._updated)
+            self._updated = now
+            return delay
+
+
+class SharedTokenBucket(TokenBucket):
+    """A TokenBucket whose state is one row of ``db_path``, shared across processes."""
+
+    def __init__(self, db_path, host, rate, burst=1):
+        super().__init__(rate, burst)
+        self.db_path = db_path
+        self.host = host
+
+    def reserve(self):
+        with closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None)) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated FROM buckets WHERE host = ?', (self.host,)).fetchone()
+                # Wall-clock time, since monotonic clocks are not comparable between processes.
+                now = time.time()
+                tokens, updated = row if row else (float(self.burst), now)
+                tokens, delay = self._take(tokens, now - updated)
+                conn.execute('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)', (self.host, tokens, now))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return delay
+
+
+class HostRateLimiter:
+    """One token bucket per host; a ``rate`` of 0 or None disables limiting."""
+
+    def __init__(self, rate, burst=1, db_path=None):
+        self.rate = rate
+        self.burst = burst
+        self.db_path = db_path
+        self._buckets = {}
+        self._lock = threading.Lock()
+        if db_path and rate:
+            with closing(sqlite3.connect(db_path, timeout=30, isolation_level=None)) as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                if self.db_path:
+                    bucket = SharedTokenBucket(self.db_path, host, self.rate, self.burst)
+                else:
+                    bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url_or_host):
+        """Block until a request to the host may go out; returns seconds waited."""
+        if not self.rate:
+            return 0.0
+        host = urlsplit(url_or_host).hostname or url_or_host
+        delay = self._bucket(host).reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+def backoff_delay(attempt, base=2.0, cap=60.0, rng=random):
+    """Full-jitter exponential backoff: a random delay in [0, base * 2**attempt], capped."""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
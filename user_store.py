@@ -0,0 +1,144 @@
+import hashlib
+import hmac
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    firstname TEXT,
+    lastname TEXT,
+    email TEXT,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users (username);
+"""
+
+_COLUMNS = ('username', 'password_hash', 'firstname', 'lastname', 'email', 'created_at')
+
+
+class UserExists(ValueError):
+    pass
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by the threads of one process."""
+
+    def __init__(self, db_path, size=4, timeout=30):
+        self._connections = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._connections.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class VerifiedLoginCache:
+    """Remembers recent successful password checks for ``ttl`` seconds.
+
+    Entries are keyed on an HMAC of the username, password and stored hash,
+    so no password is kept and a password change invalidates the entry.
+    """
+
+    def __init__(self, secret, max_entries=256, ttl=300):
+        self._secret = secret.encode('utf-8') if isinstance(secret, str) else secret
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, username, password, password_hash):
+        message = '\0'.join((username, password, password_hash)).encode('utf-8')
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def check(self, username, password, password_hash):
+        key = self._key(username, password, password_hash)
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def remember(self, username, password, password_hash):
+        if not self.max_entries:
+            return
+        key = self._key(username, password, password_hash)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class UserStore:
+    """Accounts persisted in SQLite, so every worker process sees the same users."""
+
+    def __init__(self, db_path, secret, pool_size=4, hash_method='scrypt',
+                 verify_cache_size=256, verify_cache_ttl=300):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.hash_method = hash_method
+        self._pool = ConnectionPool(db_path, size=pool_size)
+        self._verified = VerifiedLoginCache(secret, verify_cache_size, verify_cache_ttl)
+        with self._pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def get(self, username):
+        with self._pool.connection() as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM users WHERE username = ?",
+                               (username,)).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def create(self, username, password, firstname='', lastname='', email=''):
+        password_hash = generate_password_hash(password, method=self.hash_method)
+        try:
+            with self._pool.connection() as conn:
+                conn.execute(f"INSERT INTO users ({', '.join(_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                             (username, password_hash, firstname, lastname, email, time.time()))
+        except sqlite3.IntegrityError:
+            raise UserExists(username) from None
+
+    def verify(self, username, password):
+        """Return the user if ``password`` matches, else None."""
+        if not username or password is None:
+            return None
+        user = self.get(username)
+        if user is None:
+            return None
+        if self._verified.check(username, password, user['password_hash']):
+            return user
+        if not check_password_hash(user['password_hash'], password):
+            return None
+        self._verified.remember(username, password, user['password_hash'])
+        return user
+
+    def close(self):
+        self._pool.close()
@@ -0,0 +1,153 @@
+"""Semester views served from an in-memory index over the results store.
+
+A view is a named list of subject codes declared in config (see
+``SEMESTER_VIEWS`` in config.py). The index is rebuilt only when the store's
+data version changes; every slice after that is a NumPy selection.
+"""
+import threading
+
+import numpy as np
+
+import metrics
+from results_store import MISSING, NUMERIC, STATUS_LABELS
+
+
+class UnknownView(KeyError):
+    pass
+
+
+def usn_branch(usn):
+    # VTU USNs look like 1CR21IS001: region, college, year, branch, roll number.
+    return usn[5:7].upper()
+
+
+class ViewSlice:
+    """Marks and status codes for a set of USNs × subjects."""
+
+    def __init__(self, version, name, label, usns, subjects, missing_subjects, marks, codes):
+        self.version = version
+        self.name = name
+        self.label = label
+        self.usns = usns
+        self.subjects = subjects
+        self.missing_subjects = missing_subjects
+        self.marks = marks
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.usns)
+
+    @property
+    def header(self):
+        return ['USN'] + self.subjects
+
+    def _cell_label(self, mark, code):
+        if code == NUMERIC:
+            return str(int(mark))
+        return STATUS_LABELS.get(int(code), MISSING)
+
+    def iter_rows(self):
+        """Yield ``[usn, label, ...]`` rows as shown in exports."""
+        for usn, marks, codes in zip(self.usns, self.marks, self.codes):
+            yield [str(usn)] + [self._cell_label(m, c) for m, c in zip(marks, codes)]
+
+    def records(self):
+        """One dict per USN: ints for marks, status labels as strings, None if not taken."""
+        records = []
+        for usn, marks, codes in zip(self.usns, self.marks, self.codes):
+            record = {'USN': str(usn)}
+            for subject, mark, code in zip(self.subjects, marks, codes):
+                if code == NUMERIC:
+                    record[subject] = int(mark)
+                else:
+                    record[subject] = STATUS_LABELS.get(int(code))
+            records.append(record)
+        return records
+
+    def to_dict(self):
+        return {
+            'view': self.name,
+            'label': self.label,
+            'version': self.version,
+            'subjects': self.subjects,
+            'missing_subjects': self.missing_subjects,
+            'count': len(self),
+            'rows': self.records(),
+        }
+
+
+class ResultsIndex:
+    """Dense marks/codes matrices with USN→row and subject→column lookups."""
+
+    def __init__(self, version, usns, subjects, marks, codes):
+        self.version = version
+        self.usns = np.asarray(usns, dtype=str)
+        self.subjects = list(subjects)
+        self.marks = marks
+        self.codes = codes
+        self.usn_index = {usn: i for i, usn in enumerate(self.usns.tolist())}
+        self.subject_index = {subject: j for j, subject in enumerate(self.subjects)}
+        self.branches = np.asarray([usn_branch(usn) for usn in self.usns.tolist()], dtype=str)
+
+    @classmethod
+    def from_store(cls, store):
+        version, marks_df, codes_df = store.load_snapshot()
+        subjects = [col for col in marks_df.columns if col != 'USN']
+        marks = marks_df[subjects].to_numpy(dtype='float32', na_value=np.nan)
+        codes = codes_df[subjects].to_numpy(dtype='int8')
+        return cls(version, marks_df['USN'].astype(str).tolist(), subjects, marks, codes)
+
+    def row_mask(self, branch=None, prefix=None, usns=None):
+        mask = np.ones(len(self.usns), dtype=bool)
+        if branch:
+            mask &= self.branches == branch.upper()
+        if prefix:
+            mask &= np.char.startswith(self.usns, prefix.upper())
+        if usns:
+            rows = [self.usn_index[usn] for usn in usns if usn in self.usn_index]
+            selected = np.zeros(len(self.usns), dtype=bool)
+            selected[rows] = True
+            mask &= selected
+        return mask
+
+    def slice(self, subjects, branch=None, prefix=None, usns=None, name=None, label=None):
+        present = [s for s in subjects if s in self.subject_index]
+        missing = [s for s in subjects if s not in self.subject_index]
+        columns = [self.subject_index[s] for s in present]
+        rows = np.flatnonzero(self.row_mask(branch, prefix, usns))
+        codes = self.codes[np.ix_(rows, columns)]
+        # Keep only students who took at least one subject of the view.
+        taken = (codes != -1).any(axis=1) if columns else np.zeros(len(rows), dtype=bool)
+        rows = rows[taken]
+        return ViewSlice(self.version, name, label, self.usns[rows], present, missing,
+                         self.marks[np.ix_(rows, columns)], codes[taken])
+
+
+class ViewEngine:
+    def __init__(self, store, views):
+        self.store = store
+        self.views = {str(name): definition for name, definition in views.items()}
+        self._index = None
+        self._lock = threading.Lock()
+
+    def index(self):
+        version = self.store.version
+        index = self._index
+        if index is None or index.version != version:
+            with self._lock:
+                if self._index is None or self._index.version != version:
+                    with metrics.span('dataframe_build'):
+                        self._index = ResultsIndex.from_store(self.store)
+                index = self._index
+        return index
+
+    def definition(self, name):
+        try:
+            return self.views[str(name)]
+        except KeyError:
+            raise UnknownView(name) from None
+
+    def view(self, name, branch=None, prefix=None, usns=None):
+        definition = self.definition(name)
+        return self.index().slice(definition['subjects'], branch=branch, prefix=prefix, usns=usns,
+                                  name=str(name), label=definition.get('label', str(name)))
@@ -0,0 +1,121 @@
+from flask import (Blueprint, render_template, request, redirect, url_for, session,
+                   flash, Response, jsonify, abort, current_app)
+
+from auth import is_logged_in
+from export import view_filters
+import metrics
+from services import get_services
+
+
+bp = Blueprint('visualize', __name__)
+
+
+def get_cohort_stats(services, username, view_name, filters=None, bin_width=None, n=10):
+    """Aggregates for one user's view, memoized per data version and parameters."""
+    config = services.config
+    filters = filters or {}
+    bin_width = bin_width or config['STATS_BIN_WIDTH']
+    key = (username, services.get_results_store(username).version, view_name, tuple(sorted((k, str(v)) for k, v in filters.items() if v)),
+           bin_width, n)
+    result = services.stats_cache.get(key)
+    if result is None:
+        import stats
+
+        view = services.get_view_engine(username).view(view_name, **filters)
+        with metrics.span('stats'):
+            result = stats.cohort_stats(view, config['PASS_MARK'], bin_width=bin_width,
+                                        max_mark=config['MAX_MARK'], n=n)
+        services.stats_cache.put((username, view.version) + key[2:], result)
+    return result
+
+
+def get_chart_figures(services, username, view_name):
+    """Prebuilt figure JSON for one user's view, or None if it has no data.
+
+    Figures are drawn from the view's aggregates and cached on (data
+    version, view), so repeat visits between scrapes do no work at all.
+    """
+    key = (username, services.get_results_store(username).version, view_name)
+    figures = services.chart_cache.get(key)
+    if figures is None:
+        cohort = get_cohort_stats(services, username, view_name)
+        if not cohort['subjects'] or not cohort['students']:
+            return None
+        # plotly is the heaviest import in the app; only chart requests load it.
+        import charts
+
+        with metrics.span('chart_render'):
+            figures = charts.build_figures(cohort)
+        services.chart_cache.put((username, cohort['version'], view_name), figures)
+    return figures
+
+
+@bp.route('/visualize_data')
+def visualize_data():
+    if not is_logged_in():
+        flash('Please log in.', 'warning')
+        return redirect(url_for('auth.user_login'))
+
+    try:
+        figures = get_chart_figures(get_services(), session['username'], '5')
+        if figures is None:
+            flash('No 5th sem results stored yet. Run "Check USNs & Generate Excel" first.', 'error')
+            return redirect(url_for('scraping.check_page'))
+        return render_template('visualize.html', figures=figures)
+    except Exception as e:
+        current_app.logger.exception("Error in /visualize_data")
+        flash(f'Error visualizing data: {str(e)}. Check console.', 'error')
+    return redirect(url_for('scraping.check_page'))
+
+
+@bp.route('/visualize_data/<view_name>/figures.json')
+def chart_figures(view_name):
+    from views import UnknownView
+
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    try:
+        figures = get_chart_figures(get_services(), session['username'], view_name)
+    except UnknownView:
+        return jsonify({'error': f"Unknown semester view '{view_name}'."}), 404
+    if figures is None:
+        return jsonify({'error': 'No results stored for this view yet.'}), 404
+    import charts
+
+    body = '{' + ','.join(f'"{name}":{figures[name]}' for name in charts.FIGURES) + '}'
+    return Response(body, mimetype='application/json')
+
+
+def _int_arg(name, default, low, high):
+    try:
+        value = int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        abort(400, f"'{name}' must be an integer.")
+    return min(max(value, low), high)
+
+
+@bp.route('/api/stats/<view_name>')
+@bp.route('/api/stats/<view_name>/<part>')
+def cohort_statistics(view_name, part=None):
+    """Per-subject summary, binned histograms and top/bottom students.
+
+    ``part`` narrows the response to ``summary``, ``histogram`` or
+    ``ranking``. Accepts the /view filters plus ``bin_width`` and ``n``.
+    """
+    from views import UnknownView
+
+    if not is_logged_in():
+        return jsonify({'error': 'login required'}), 401
+    parts = {'summary': 'subjects', 'histogram': 'histogram', 'ranking': 'ranking'}
+    if part is not None and part not in parts:
+        return jsonify({'error': f"Unknown statistics '{part}'.", 'parts': sorted(parts)}), 404
+    config = current_app.config
+    try:
+        result = get_cohort_stats(get_services(), session['username'], view_name, view_filters(),
+                                  bin_width=_int_arg('bin_width', config['STATS_BIN_WIDTH'], 1, config['MAX_MARK']),
+                                  n=_int_arg('n', 10, 1, 100))
+    except UnknownView:
+        return jsonify({'error': f"Unknown semester view '{view_name}'."}), 404
+    if part is not None:
+        result = {key: result[key] for key in ('view', 'version', 'students')} | {part: result[parts[part]]}
+    return jsonify(result)
@@ -0,0 +1,135 @@
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import (NoAlertPresentException, NoSuchElementException,
+                                        StaleElementReferenceException, TimeoutException)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+USN_LOCATOR = (By.NAME, 'lns')
+CAPTCHA_LOCATOR = (By.NAME, 'captchacode')
+SUBMIT_LOCATOR = (By.ID, 'submit')
+CAPTCHA_IMAGE_LOCATOR = (By.XPATH, '//img[contains(@src, "captcha")]')
+RESULT_LOCATOR = (By.XPATH, '//table[contains(@class,"table")] | //table[@id="resultsTable"]'
+                            ' | //div[contains(@class, "divTableRow")]')
+
+RESULT = 'result'
+INVALID_USN = 'invalid_usn'
+NOT_AVAILABLE = 'not_available'
+BAD_CAPTCHA = 'bad_captcha'
+TIMEOUT = 'timeout'
+CAPTCHA_TIMEOUT = 'captcha_timeout'
+
+PAGE_MARKERS = (
+    ('Invalid USN', INVALID_USN),
+    ('Seat Number is not available or Invalid', INVALID_USN),
+    ('Results are not yet available', NOT_AVAILABLE),
+    ('Please enter valid captcha', BAD_CAPTCHA),
+)
+
+DEFAULT_TIMEOUTS = {'page_load': 20, 'captcha': 120, 'result': 30}
+POLL_FREQUENCY = 0.25
+
+
+class Outcome:
+    __slots__ = ('kind', 'detail')
+
+    def __init__(self, kind, detail=None):
+        self.kind = kind
+        self.detail = detail
+
+    @property
+    def ok(self):
+        return self.kind == RESULT
+
+    def __repr__(self):
+        return f'Outcome({self.kind!r}, {self.detail!r})'
+
+
+class PhaseTimings(dict):
+    """Seconds spent in each named phase of one scrape."""
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[name] = self.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self):
+        return ', '.join(f'{name}={seconds:.2f}s' for name, seconds in self.items())
+
+
+def classify_page(text):
+    for marker, kind in PAGE_MARKERS:
+        if marker in text:
+            return kind
+    return None
+
+
+class captcha_filled:
+    """Truthy once the captcha input holds ``min_length`` characters.
+
+    Also succeeds if the operator already submitted the form themselves, in
+    which case the form URL is gone and there is nothing left to click.
+    """
+
+    def __init__(self, form_url, locator=CAPTCHA_LOCATOR, min_length=6):
+        self.form_url = form_url
+        self.locator = locator
+        self.min_length = min_length
+
+    def __call__(self, driver):
+        if driver.current_url != self.form_url:
+            return 'submitted'
+        try:
+            value = driver.find_element(*self.locator).get_attribute('value') or ''
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+        return 'filled' if len(value.strip()) >= self.min_length else False
+
+
+class submission_outcome:
+    """Resolves to an :class:`Outcome` once the site has answered a submit.
+
+    The VTU site reports a bad captcha with a JavaScript alert, and reports
+    invalid or unpublished USNs in the page body. A result is only accepted
+    once the URL has moved off the form and the marks table is in the DOM.
+    """
+
+    def __init__(self, form_url, result_locator=RESULT_LOCATOR):
+        self.form_url = form_url
+        self.result_locator = result_locator
+
+    def __call__(self, driver):
+        try:
+            alert = driver.switch_to.alert
+            text = alert.text or ''
+            alert.accept()
+            return Outcome(classify_page(text) or BAD_CAPTCHA, text)
+        except NoAlertPresentException:
+            pass
+
+        kind = classify_page(driver.page_source)
+        if kind:
+            return Outcome(kind)
+        if driver.current_url != self.form_url and driver.find_elements(*self.result_locator):
+            return Outcome(RESULT)
+        return False
+
+
+def wait(driver, timeout):
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY,
+                         ignored_exceptions=(StaleElementReferenceException,))
+
+
+def wait_for_result(driver, form_url, timeout):
+    try:
+        return wait(driver, timeout).until(submission_outcome(form_url))
+    except TimeoutException:
+        if driver.current_url == form_url:
+            # Still on the form: the site rejected the captcha without saying so.
+            return Outcome(BAD_CAPTCHA, 'no navigation after submit')
+        return Outcome(TIMEOUT)
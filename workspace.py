@@ -0,0 +1,91 @@
+"""Per-user directories under RESULTS_DIR.
+
+Layout::
+
+    <base>/users/<user>/results.sqlite3       results store
+    <base>/users/<user>/parse_cache.sqlite3   parse cache
+    <base>/users/<user>/archive/              fetched pages (see page_archive.py)
+
+Nothing is shared between users. Concurrent runs of one user share the
+archive, where each fetch is recorded under its run id.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+
+def atomic_write(path, data):
+    """Write ``data`` (str or bytes) to ``path`` via a temp file and rename.
+
+    Readers see either the old file or the complete new one, never a
+    partial write.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data.encode('utf-8') if isinstance(data, str) else data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _dir_name(username):
+    # Readable, filesystem-safe, and distinct even for names that sanitize alike.
+    safe = re.sub(r'[^A-Za-z0-9_.-]', '_', username)[:40] or 'user'
+    return f"{safe}-{hashlib.sha1(username.encode('utf-8')).hexdigest()[:8]}"
+
+
+class UserWorkspace:
+    def __init__(self, base_dir, username):
+        self.username = username
+        self.name = _dir_name(username)
+        self.path = os.path.join(base_dir, self.name)
+        self.results_db = os.path.join(self.path, 'results.sqlite3')
+        self.parse_cache_db = os.path.join(self.path, 'parse_cache.sqlite3')
+        self.archive_dir = os.path.join(self.path, 'archive')
+
+
+class WorkspaceManager:
+    def __init__(self, base_dir):
+        self.users_dir = os.path.join(base_dir, 'users')
+        os.makedirs(self.users_dir, exist_ok=True)
+
+    def user(self, username):
+        return UserWorkspace(self.users_dir, username)
+
+    def user_dirs(self):
+        return [os.path.join(self.users_dir, name) for name in sorted(os.listdir(self.users_dir))
+                if os.path.isdir(os.path.join(self.users_dir, name))]
+
+    def collect_garbage(self, max_age_seconds, extra_dirs=()):
+        """Prune every user's page archive and delete files in ``extra_dirs``, past ``max_age_seconds``.
+
+        Each archive keeps the newest page per USN and exam session however
+        old it is (see PageArchive.prune). Returns the number of files removed.
+        """
+        # page_archive imports this module for atomic_write.
+        from page_archive import PageArchive
+
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for user_dir in self.user_dirs():
+            archive_dir = os.path.join(user_dir, 'archive')
+            if os.path.isdir(archive_dir):
+                removed += PageArchive(archive_dir).prune(cutoff)
+        for directory in extra_dirs:
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+        return removed